@@ -0,0 +1,117 @@
+"""Streamlit glue shared by st_suduku1.py and suduku_generator.py.
+
+Server-wide resources (puzzle pool, session store, leaderboard), the
+per-tab session ID, the board and undo/redo callbacks, and the sidebar
+expanders both apps show. Everything works on st.session_state.game.
+"""
+
+import os
+import uuid
+
+import streamlit as st
+
+from game_store import GameStore
+from leaderboard import Leaderboard
+from puzzle_bank import PuzzleBank
+from puzzle_pool import PuzzlePool
+from sudoku_board import new_board_event
+from sudoku_solver import generate_puzzle_with_id
+
+# Ready-made puzzles shared by every session in this server process.
+# Set SUDOKU_PUZZLE_BANK to a bank file to serve puzzles from it instead
+# of generating them live.
+POOL_HIGH_WATER = 10
+PUZZLE_BANK_PATH = os.environ.get("SUDOKU_PUZZLE_BANK")
+
+# In-progress games are saved to a local SQLite file so they survive a
+# server restart. Set SUDOKU_SESSION_DB to choose where it lives.
+SESSION_DB_PATH = os.environ.get("SUDOKU_SESSION_DB", "sudoku_sessions.sqlite3")
+
+# Finished games go to a local SQLite leaderboard (SUDOKU_LEADERBOARD_DB)
+LEADERBOARD_DB_PATH = os.environ.get("SUDOKU_LEADERBOARD_DB", "sudoku_leaderboard.sqlite3")
+
+
+@st.cache_resource
+def get_puzzle_pool():
+    if PUZZLE_BANK_PATH:
+        return PuzzlePool(high_water=POOL_HIGH_WATER, generate=PuzzleBank(PUZZLE_BANK_PATH).random_puzzle).start()
+    return PuzzlePool(high_water=POOL_HIGH_WATER, generate=generate_puzzle_with_id).start()
+
+
+@st.cache_resource
+def get_game_store():
+    return GameStore(SESSION_DB_PATH).start()
+
+
+@st.cache_resource
+def get_leaderboard():
+    return Leaderboard(LEADERBOARD_DB_PATH).start()
+
+
+def session_id():
+    """ID of this browser tab, kept in the URL so a reconnecting tab finds its game"""
+    if 'sid' not in st.query_params:
+        st.query_params['sid'] = uuid.uuid4().hex
+    return st.query_params['sid']
+
+
+def save_game():
+    get_game_store().save(session_id(), st.session_state.game)
+
+
+# Board interaction: callbacks run before the rerun, so the board shows
+# the change, and a fragment around the board reruns only that section
+
+def apply_board_event():
+    """Apply the click/key event from the board component, if there is a new one"""
+    board_event = new_board_event()
+    if board_event:
+        i, j = board_event['row'], board_event['col']
+        if not st.session_state.game.is_given(i, j):
+            st.session_state.selected_cell = (i, j)
+            if board_event['digit'] is not None:
+                st.session_state.game.set_cell(i, j, board_event['digit'])
+
+
+def undo_move():
+    cell = st.session_state.game.undo()
+    if cell:
+        st.session_state.selected_cell = cell
+
+
+def redo_move():
+    cell = st.session_state.game.redo()
+    if cell:
+        st.session_state.selected_cell = cell
+
+
+# Sidebar expanders
+
+def leaderboard_expander():
+    """Leaderboard, drawn from an in-memory snapshot so it never waits for the database"""
+    with st.expander("🏆 Leaderboard"):
+        game = st.session_state.game
+        leaders = get_leaderboard().snapshot(game.difficulty)
+        if leaders is None:
+            st.caption("Loading…")
+        elif not leaders['top']:
+            st.caption(f"No {game.difficulty} games finished yet")
+        else:
+            for rank, (_, seconds, hints, mistakes, _) in enumerate(leaders['top'], 1):
+                st.write(f"**{rank}.** {game.format_time(seconds)} • {hints} hints • {mistakes} mistakes")
+            st.caption(f"{leaders['games']} {game.difficulty} games finished")
+            if st.session_state.game_over:
+                share = get_leaderboard().percentile(game.get_elapsed_time(), game.difficulty)
+                if share is not None:
+                    st.success(f"Your time beats {share}% of {game.difficulty} games")
+
+
+def puzzle_pool_expander():
+    """Puzzle pool status"""
+    with st.expander("🧩 Puzzle Pool"):
+        pool = get_puzzle_pool()
+        for (level, backend), info in pool.stats().items():
+            refill = f"{info['refill_ms']} ms" if info['refill_ms'] is not None else "-"
+            st.write(f"**{level.title()} ({backend}):** {info['size']} ready • {info['hits']} hits • {info['misses']} misses • refill {refill}")
+        if pool.refill_errors:
+            st.warning(f"{pool.refill_errors} refills failed; see the server log")
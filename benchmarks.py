@@ -0,0 +1,271 @@
+"""Benchmarks for puzzle generation, solving, validation and export.
+
+Every case runs a fixed number of times on fixed seeds (run k uses seed
+--seed + k), so two runs of the same code do the same work and only the
+timings differ. Grading and puzzle ID caches are cleared before every
+timed run, so no case is sped up by work its fixtures already did. For
+each case the median and 95th percentile time is reported with the
+solver work behind it: search nodes, and for puzzle generation the
+number of graded attempts, which is what makes expert generation times
+vary so much.
+
+    python benchmarks.py -o before.json
+    python benchmarks.py --baseline before.json
+
+With --baseline the run fails (exit status 1) when a case's median time
+or median node count is more than --max-slowdown percent above the
+baseline's. Medians under --min-ms are too noisy to compare and only
+need to stay under it. Fast cases are timed over many calls, best of
+ROUNDS per seed, and reported per call. Node counts are the same on
+every machine; timings are only comparable between runs on the same,
+otherwise idle one.
+Nothing here needs a GPU, the network or extra packages.
+"""
+
+import argparse
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+from functools import lru_cache
+
+from board_render import render_svg, render_text
+from sudoku_engine import DOCX_AVAILABLE, EXPORT_FORMATS, SudokuGame
+from sudoku_grader import _grade_line
+from sudoku_solver import (
+    DEFAULT_BACKEND, DIFFICULTY_LEVELS, SOLVER_BACKENDS, count_work,
+    generate_seeded_puzzle, puzzle_from_id,
+)
+
+BASE_SEED = 20240601
+REPEAT = 20
+ROUNDS = 3
+MAX_SLOWDOWN = 50.0
+MIN_MS = 2.0
+
+
+# Fixtures, built outside the timed part. Building them grades puzzles
+# (often on the same seeds the generation cases use), so the result
+# caches are cleared again before every timed run.
+
+@lru_cache(maxsize=None)
+def _puzzle(difficulty, seed, backend):
+    return generate_seeded_puzzle(difficulty, seed, backend)
+
+
+def _clear_caches():
+    _grade_line.cache_clear()
+    puzzle_from_id.cache_clear()
+
+
+def _cold_export(build, game):
+    render_text.cache_clear()
+    render_svg.cache_clear()
+    return build(game, True)
+
+
+def _game(difficulty, seed, backend):
+    return SudokuGame(difficulty, backend, puzzle=_puzzle(difficulty, seed, backend))
+
+
+def _game_with_conflicts(seed, backend):
+    """Medium game half filled in, with a few wrong entries"""
+    game = _game('medium', seed, backend)
+    rng = random.Random(seed)
+    empty = [(i, j) for i in range(9) for j in range(9) if game.user_board[i][j] == 0]
+    rng.shuffle(empty)
+    for k, (i, j) in enumerate(empty[:len(empty) // 2]):
+        digit = int(game.solution[i][j])
+        game.set_cell(i, j, digit % 9 + 1 if k % 8 == 0 else digit)
+    return game
+
+
+def _hint_game(seed, backend):
+    """A fresh game per timing; get_hint picks its cell with the random module"""
+    random.seed(seed)
+    return _game('medium', seed, backend)
+
+
+# Cases: name -> (setup(seed, backend) -> state, run(state), calls per timing).
+# Single calls under a millisecond are mostly timer noise, so fast cases
+# are timed over enough calls for each timing to take a few milliseconds
+# and reported per call.
+
+def _cases(backend):
+    cases = {
+        'generate_solution': (
+            lambda seed, backend: (SudokuGame('easy', backend, puzzle=_puzzle('easy', 0, backend)), random.Random(seed)),
+            lambda state: state[0].generate_solution(state[1]),
+            50,
+        ),
+        'generate_solution[search]': (
+            lambda seed, backend: (SudokuGame('easy', backend, puzzle=_puzzle('easy', 0, backend)), random.Random(seed)),
+            lambda state: state[0].generate_solution(state[1], fast=False),
+            5,
+        ),
+    }
+    for difficulty in ('medium', 'expert'):
+        cases[f'has_unique_solution[{difficulty}]'] = (
+            lambda seed, backend, difficulty=difficulty: _game(difficulty, seed, backend),
+            lambda game: game.has_unique_solution(),
+            10 if difficulty == 'medium' else 3,
+        )
+    for difficulty in DIFFICULTY_LEVELS:
+        cases[f'generate_new_puzzle[{difficulty}]'] = (
+            lambda seed, backend, difficulty=difficulty: (SudokuGame(difficulty, backend, puzzle=_puzzle('easy', 0, backend)), seed),
+            lambda state: state[0].generate_new_puzzle(state[1]),
+            1,
+        )
+    cases['check_errors'] = (
+        lambda seed, backend: _game_with_conflicts(seed, backend),
+        lambda game: game.check_errors(),
+        50,
+    )
+    # A medium game has 50 empty cells, so every call still fills one
+    cases['get_hint'] = (
+        _hint_game,
+        lambda game: game.get_hint(),
+        40,
+    )
+    for fmt, build in EXPORT_FORMATS.items():
+        if fmt == 'docx' and not DOCX_AVAILABLE:
+            continue
+        # Straight to the format's builder: export() would return cached
+        # results, and the board renders are dropped so no call reuses them
+        cases[f'export[{fmt}]'] = (
+            lambda seed, backend: _game('medium', seed, backend),
+            lambda game, build=build: _cold_export(build, game),
+            1 if fmt == 'docx' else 20,
+        )
+    return cases
+
+
+def _percentile(values, share):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(share * len(ordered)) - 1)]
+
+
+def run_case(setup, run, number, repeat, seed, backend):
+    """Time `repeat` runs on seeds seed, seed + 1, ...; returns the result dict"""
+    # Warm-up on a seed outside the measured range
+    run(setup(seed - 1, backend))
+    times, nodes, attempts = [], [], []
+    for k in range(repeat):
+        # Best of ROUNDS timings of the same work: slower ones only add
+        # whatever else the machine was doing
+        best = math.inf
+        for _ in range(ROUNDS):
+            state = setup(seed + k, backend)
+            _clear_caches()
+            with count_work() as work:
+                start = time.perf_counter()
+                for _ in range(number):
+                    run(state)
+                best = min(best, time.perf_counter() - start)
+        times.append(1000 * best / number)
+        nodes.append(work.nodes / number)
+        attempts.append(work.attempts / number)
+    result = {
+        'runs': repeat,
+        'median_ms': round(statistics.median(times), 4),
+        'p95_ms': round(_percentile(times, 0.95), 4),
+        'max_ms': round(max(times), 4),
+    }
+    if any(nodes):
+        result['median_nodes'] = statistics.median(nodes)
+        result['p95_nodes'] = _percentile(nodes, 0.95)
+    if any(attempts):
+        result['median_attempts'] = statistics.median(attempts)
+        result['p95_attempts'] = _percentile(attempts, 0.95)
+    return result
+
+
+def run_benchmarks(repeat=REPEAT, seed=BASE_SEED, backend=DEFAULT_BACKEND, only=None, report=None):
+    """Run every case whose name contains `only`; returns the JSON-ready results"""
+    results = {}
+    for name, (setup, run, number) in _cases(backend).items():
+        if only and only not in name:
+            continue
+        results[name] = run_case(setup, run, number, repeat, seed, backend)
+        if report:
+            report(name, results[name])
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'repeat': repeat,
+            'seed': seed,
+            'backend': backend,
+        },
+        'results': results,
+    }
+
+
+def compare(results, baseline, max_slowdown=MAX_SLOWDOWN, min_ms=MIN_MS):
+    """Regressions of `results` against `baseline`, as readable lines"""
+    regressions = []
+    for name, result in results['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        limit = max(before['median_ms'] * (1 + max_slowdown / 100), min_ms)
+        if result['median_ms'] > limit:
+            change = 100 * (result['median_ms'] / before['median_ms'] - 1) if before['median_ms'] else math.inf
+            regressions.append(f"{name}: median {result['median_ms']:.3f} ms vs {before['median_ms']:.3f} ms "
+                               f"(+{change:.0f}%, limit +{max_slowdown:g}%)")
+        # Node counts do not depend on the machine, so they catch slower
+        # searches even when timings are too noisy to
+        nodes, nodes_before = result.get('median_nodes'), before.get('median_nodes')
+        if nodes and nodes_before and nodes > nodes_before * (1 + max_slowdown / 100):
+            regressions.append(f"{name}: median {nodes:.0f} nodes vs {nodes_before:.0f} "
+                               f"(+{100 * (nodes / nodes_before - 1):.0f}%, limit +{max_slowdown:g}%)")
+    return regressions
+
+
+def _print_row(name, result):
+    nodes = result.get('median_nodes')
+    attempts = result.get('median_attempts')
+    print(f"{name:<32} {result['median_ms']:>10.3f} {result['p95_ms']:>10.3f} "
+          f"{'' if nodes is None else f'{nodes:.0f}':>10} {'' if attempts is None else f'{attempts:g}':>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark generation, solving, validation and export")
+    parser.add_argument("-o", "--output", help="save the results as JSON")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--max-slowdown", type=float, default=MAX_SLOWDOWN,
+                        help=f"allowed median slowdown in percent (default {MAX_SLOWDOWN:g})")
+    parser.add_argument("--min-ms", type=float, default=MIN_MS,
+                        help=f"medians below this are not compared (default {MIN_MS:g})")
+    parser.add_argument("-r", "--repeat", type=int, default=REPEAT, help="timed runs per case")
+    parser.add_argument("--seed", type=int, default=BASE_SEED, help="seed of the first run")
+    parser.add_argument("-k", "--only", help="run only cases whose name contains this")
+    parser.add_argument("--backend", choices=list(SOLVER_BACKENDS), default=DEFAULT_BACKEND)
+    args = parser.parse_args(argv)
+
+    print(f"{'case':<32} {'median ms':>10} {'p95 ms':>10} {'nodes':>10} {'attempts':>9}")
+    results = run_benchmarks(args.repeat, args.seed, args.backend, args.only, report=_print_row)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            json.dump(results, out, indent=2)
+            out.write("\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as source:
+            baseline = json.load(source)
+        regressions = compare(results, baseline, args.max_slowdown, args.min_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No case slowed by more than {args.max_slowdown:g}%", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
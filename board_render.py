@@ -0,0 +1,139 @@
+"""Board layouts shared by the share preview and the exports: text, SVG and HTML.
+
+Every layout is built once as a template with a slot for each of the 81
+cells; rendering a board only fills in the digits. Boards are passed as
+81-character lines ('.' or '0' for blanks, see sudoku_solver.board_to_line)
+and renders are cached per line, so drawing an unchanged board again is a
+dictionary lookup.
+
+    render_text(line, 'box')      framed grid with box-drawing characters
+    render_text(line, 'plain')    dots, '|' and '-' only (share preview, simple export)
+    render_svg(line, givens)      vector grid; given digits bold on a shaded cell
+    render_html(title, grids)     printable page holding one or more SVG grids
+
+The PDF equivalent is pdf_writer.grid_ops.
+"""
+
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+RENDER_CACHE_SIZE = 1024
+
+# Pieces of each text layout; a row is edge + cells ('{} ' each, divider
+# before columns 3 and 6) + end
+TEXT_STYLES = {
+    'box': {
+        'top': "╔═══════╦═══════╦═══════╗\n",
+        'middle': "╠═══════╬═══════╬═══════╣\n",
+        'bottom': "╚═══════╩═══════╩═══════╝\n",
+        'edge': "║ ",
+        'divider': "║ ",
+        'end': "║\n",
+        'blank': "·",
+    },
+    'plain': {
+        'top': "",
+        'middle': "------+-------+------\n",
+        'bottom': "",
+        'edge': "",
+        'divider': "| ",
+        'end': "\n",
+        'blank': ".",
+    },
+}
+
+# Colours match the board component
+GIVEN_COLOR = "#1E293B"
+ENTRY_COLOR = "#1E40AF"
+GIVEN_FILL = "#F1F5F9"
+THIN_COLOR = "#94A3B8"
+
+
+@lru_cache(maxsize=None)
+def _text_template(style):
+    """(format string with 81 slots, blank translation table) for a text style"""
+    parts = TEXT_STYLES[style]
+    row = parts['edge'] + "".join(
+        (parts['divider'] if j % 3 == 0 and j > 0 else "") + "{} " for j in range(9)
+    ) + parts['end']
+    lines = [parts['top']]
+    for i in range(9):
+        if i % 3 == 0 and i > 0:
+            lines.append(parts['middle'])
+        lines.append(row)
+    lines.append(parts['bottom'])
+    return "".join(lines), str.maketrans({".": parts['blank'], "0": parts['blank']})
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_text(cells, style='box'):
+    """Text grid for an 81-character line in one of TEXT_STYLES"""
+    template, blanks = _text_template(style)
+    return template.format(*cells.translate(blanks))
+
+
+@lru_cache(maxsize=32)
+def _svg_geometry(size):
+    """SVG head, grid lines and cell positions for a grid `size` pixels wide"""
+    cell = size / 9
+    thin, thick = [], []
+    for k in range(10):
+        offset = f"{k * cell:g}"
+        lines = thick if k % 3 == 0 else thin
+        lines.append(f"M{offset} 0V{size:g}M0 {offset}H{size:g}")
+    # Outer lines are drawn inside the view box so their full width shows
+    pad = 1.5
+    head = (f'<svg xmlns="http://www.w3.org/2000/svg" width="{size + 2 * pad:g}" height="{size + 2 * pad:g}" '
+            f'viewBox="{-pad:g} {-pad:g} {size + 2 * pad:g} {size + 2 * pad:g}" '
+            f'font-family="Helvetica, Arial, sans-serif" font-size="{cell * 0.6:.1f}" text-anchor="middle">')
+    grid = (f'<path d="{"".join(thin)}" stroke="{THIN_COLOR}" stroke-width="1" fill="none"/>'
+            f'<path d="{"".join(thick)}" stroke="{GIVEN_COLOR}" stroke-width="3" fill="none"/>')
+    cells = []
+    for i in range(81):
+        row, col = divmod(i, 9)
+        cells.append((f'x="{col * cell:g}" y="{row * cell:g}" width="{cell:g}" height="{cell:g}"',
+                      f'x="{(col + 0.5) * cell:.1f}" y="{(row + 0.5) * cell:.1f}" dy="0.35em"'))
+    return head, grid, cells
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_svg(cells, givens=None, size=360):
+    """SVG grid for an 81-character line.
+
+    Digits at positions that are filled in `givens` (same form) are drawn
+    bold on a shaded cell; without `givens` every digit is, as for a puzzle.
+    """
+    head, grid, positions = _svg_geometry(size)
+    shading, given, entered = [], [], []
+    for i, value in enumerate(cells):
+        if value in ".0":
+            continue
+        box, text = positions[i]
+        if givens is None or givens[i] not in ".0":
+            shading.append(f'<rect {box}/>')
+            given.append(f'<text {text}>{value}</text>')
+        else:
+            entered.append(f'<text {text}>{value}</text>')
+    return "".join((
+        head,
+        f'<g fill="{GIVEN_FILL}">', "".join(shading), "</g>",
+        grid,
+        f'<g fill="{GIVEN_COLOR}" font-weight="bold">', "".join(given), "</g>",
+        f'<g fill="{ENTRY_COLOR}">', "".join(entered), "</g>",
+        "</svg>",
+    ))
+
+
+def render_html(title, grids, lines=()):
+    """Printable HTML page: a title, info `lines`, then (heading, svg) `grids`"""
+    body = [f"<h1>{escape(title)}</h1>"]
+    body.extend(f"<p>{escape(line)}</p>" for line in lines)
+    for heading, svg in grids:
+        body.append(f'<section><h2>{escape(heading)}</h2>{svg}</section>')
+    return (
+        '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+        f"<title>{escape(title)}</title>\n"
+        "<style>body { font-family: Helvetica, Arial, sans-serif; margin: 2em; } "
+        "p { margin: 0.2em 0; } section { break-inside: avoid; margin-top: 1.5em; }</style>\n"
+        "</head>\n<body>\n" + "\n".join(body) + "\n</body>\n</html>\n"
+    )
@@ -0,0 +1,371 @@
+"""Print booklets: many puzzles laid out several to a page in one PDF or DOCX.
+
+Puzzles can come from seeds (generated in parallel on every core), a
+binary puzzle bank, a text file written by generate_puzzles.py, or any
+iterable of (puzzle, solution, caption) such as one fed by a PuzzlePool.
+Pages are written as soon as they are full, so only the 81-character
+solution lines are kept for the optional solutions appendix.
+
+The DOCX writer emits WordprocessingML straight into the zip file instead
+of building python-docx objects, so it needs no third-party packages
+either.
+
+Examples:
+    python booklet.py -n 500 -d medium --seed 1 --per-page 4 --solutions -o week42.pdf
+    python booklet.py --bank puzzles.sdkb -d expert -n 100 -o expert.docx
+    python booklet.py --input expert.txt --per-page 6 -o expert.pdf
+
+Throughput targets (500 puzzles with solutions appendix, 4 per page):
+    medium from seeds, 1 core     under 6 s (about 5 s measured, PDF or DOCX)
+    expert from seeds, 4 cores    under 10 s (expert generation is ~60 ms/puzzle/core)
+    any level from a puzzle bank  under 1 s (0.1 s PDF, 0.4 s DOCX measured)
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+
+from generate_puzzles import generate_line, seed_range_error
+from pdf_writer import A4, PdfWriter, grid_ops, text_ops
+from puzzle_bank import PuzzleBank
+from sudoku_solver import (
+    DEFAULT_BACKEND, DIFFICULTY_LEVELS, SOLVER_BACKENDS, board_to_line,
+    line_to_board, solve,
+)
+
+# Grids per page -> (columns, rows)
+LAYOUTS = {1: (1, 1), 2: (1, 2), 4: (2, 2), 6: (2, 3), 9: (3, 3), 12: (3, 4)}
+SOLUTIONS_PER_PAGE = 12
+FORMATS = ('pdf', 'docx')
+
+
+# Puzzle sources: each yields (puzzle_line, solution_line, caption)
+
+def seeded_puzzles(count, difficulty='medium', seed=0, jobs=None, backend=DEFAULT_BACKEND):
+    """Generate puzzles seed, seed + 1, ... across `jobs` processes, in order"""
+    jobs = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # A bounded window of tasks keeps memory flat and output in seed order
+        window = deque()
+        next_index = 0
+        while next_index < count or window:
+            while next_index < count and len(window) < jobs * 4:
+                window.append(executor.submit(generate_line, difficulty, seed + next_index, backend))
+                next_index += 1
+            puzzle, solution, level, _, puzzle_id = window.popleft().result().split()
+            yield puzzle, solution, f"{level.title()} · {puzzle_id}"
+
+
+def bank_puzzles(path, difficulty=None, count=None, seed=None):
+    """Puzzles from a binary bank: all of `difficulty` in order, or a random sample with `seed`"""
+    with PuzzleBank(path) as bank:
+        ids = list(bank.ids_for(difficulty)) if difficulty else list(range(len(bank)))
+        if seed is not None:
+            random.Random(seed).shuffle(ids)
+        for k in ids[:count]:
+            puzzle, solution, level, _ = bank.get(k)
+            yield board_to_line(puzzle), board_to_line(solution), f"{(level or 'unrated').title()} · #{k}"
+
+
+def text_puzzles(path, count=None):
+    """Puzzles from text lines: puzzle [solution [difficulty ...]], '#' lines skipped"""
+    done = 0
+    with open(path, encoding="utf-8") as lines:
+        for line in lines:
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+            if count is not None and done >= count:
+                break
+            puzzle = line_to_board(fields[0])
+            solution = line_to_board(fields[1]) if len(fields) > 1 else solve(puzzle)
+            if solution is None:
+                raise ValueError(f"Puzzle has no solution: {fields[0]}")
+            caption = fields[4] if len(fields) > 4 else (fields[2].title() if len(fields) > 2 else "")
+            done += 1
+            yield board_to_line(puzzle), board_to_line(solution), caption
+
+
+def pool_puzzles(pool, difficulty, count):
+    """Puzzles taken from a PuzzlePool (e.g. the apps' shared pool)"""
+    for _ in range(count):
+        puzzle, solution = pool.get(difficulty)[:2]
+        yield board_to_line(puzzle), board_to_line(solution), difficulty.title()
+
+
+def _pages(items, per_page):
+    page = []
+    for item in items:
+        page.append(item)
+        if len(page) == per_page:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+# PDF
+
+def _pdf_slots(page_size, columns, rows, margin=40, header=30, caption=16):
+    """(x, y, size, caption_y) of every grid slot on a page, row by row"""
+    width, height = page_size
+    slot_w = (width - 2 * margin) / columns
+    slot_h = (height - 2 * margin - header) / rows
+    size = min(slot_w, slot_h - caption) * 0.88
+    slots = []
+    for r in range(rows):
+        for c in range(columns):
+            x = margin + c * slot_w + (slot_w - size) / 2
+            top = height - margin - header - r * slot_h
+            slots.append((x, top - caption - size, size, top - caption + 4))
+    return slots
+
+
+def write_pdf(puzzles, out, per_page=4, solutions=True, title="Sudoku", page_size=A4):
+    """Stream puzzles into a PDF booklet; returns the number of puzzles written"""
+    columns, rows = LAYOUTS[per_page]
+    slots = _pdf_slots(page_size, columns, rows)
+    width, height = page_size
+    kept = []
+    count = 0
+    with PdfWriter(out, page_size) as pdf:
+        def header(text):
+            return text_ops(40, height - 50, text, 16, bold=True)
+
+        for page in _pages(puzzles, per_page):
+            ops = [header(f"{title} · page {pdf.page_count + 1}")]
+            for (puzzle, solution, caption), (x, y, size, caption_y) in zip(page, slots):
+                count += 1
+                ops.append(text_ops(x, caption_y, f"#{count}  {caption}", 10))
+                ops.append(grid_ops(x, y, size, puzzle))
+                if solutions:
+                    kept.append((puzzle, solution))
+            pdf.add_page("".join(ops))
+
+        if solutions:
+            columns, rows = LAYOUTS[SOLUTIONS_PER_PAGE]
+            slots = _pdf_slots(page_size, columns, rows)
+            number = 0
+            for page in _pages(kept, SOLUTIONS_PER_PAGE):
+                ops = [header(f"{title} · solutions")]
+                for (puzzle, solution), (x, y, size, caption_y) in zip(page, slots):
+                    number += 1
+                    ops.append(text_ops(x, caption_y, f"#{number}", 10))
+                    ops.append(grid_ops(x, y, size, solution, givens=puzzle))
+                pdf.add_page("".join(ops))
+    return count
+
+
+# DOCX (hand-written WordprocessingML; sizes in twentieths of a point)
+
+PAGE_W, PAGE_H, PAGE_MARGIN = 11906, 16838, 720  # A4, 0.5 inch margins
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="word/document.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>'
+)
+_DOC_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+)
+_DOC_END = (
+    f'<w:sectPr><w:pgSz w:w="{PAGE_W}" w:h="{PAGE_H}"/>'
+    f'<w:pgMar w:top="{PAGE_MARGIN}" w:right="{PAGE_MARGIN}" w:bottom="{PAGE_MARGIN}" '
+    f'w:left="{PAGE_MARGIN}" w:header="0" w:footer="0" w:gutter="0"/></w:sectPr>'
+    '</w:body></w:document>'
+)
+_PAGE_BREAK = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+_NO_BORDERS = ('<w:tblBorders><w:top w:val="nil"/><w:left w:val="nil"/><w:bottom w:val="nil"/>'
+               '<w:right w:val="nil"/><w:insideH w:val="nil"/><w:insideV w:val="nil"/></w:tblBorders>')
+
+
+def _paragraph(text, half_points, bold=False):
+    bold = "<w:b/>" if bold else ""
+    return (f'<w:p><w:pPr><w:spacing w:before="0" w:after="60"/></w:pPr>'
+            f'<w:r><w:rPr>{bold}<w:sz w:val="{half_points}"/></w:rPr><w:t>{escape(text)}</w:t></w:r></w:p>')
+
+
+class _DocxGrid:
+    """Pre-rendered XML for one grid size; only the digits are filled in per board"""
+
+    def __init__(self, cell):
+        self.cell = cell
+        half_points = max(8, int(cell / 20 * 0.55 * 2))
+        self.run = {
+            True: f'<w:r><w:rPr><w:b/><w:sz w:val="{half_points}"/></w:rPr><w:t>',
+            False: f'<w:r><w:rPr><w:sz w:val="{half_points}"/></w:rPr><w:t>',
+        }
+        self.cell_start = []
+        for i in range(81):
+            row, col = divmod(i, 9)
+            borders = "".join(
+                f'<w:{side} w:val="single" w:sz="{12 if thick else 4}" w:color="000000"/>'
+                for side, thick in (("top", row % 3 == 0), ("left", col % 3 == 0),
+                                    ("bottom", row % 3 == 2), ("right", col % 3 == 2))
+            )
+            self.cell_start.append(
+                f'<w:tc><w:tcPr><w:tcW w:w="{cell}" w:type="dxa"/><w:tcBorders>{borders}</w:tcBorders>'
+                f'<w:vAlign w:val="center"/></w:tcPr><w:p><w:pPr><w:jc w:val="center"/>'
+                f'<w:spacing w:before="0" w:after="0"/></w:pPr>'
+            )
+        self.table_start = (
+            f'<w:tbl><w:tblPr><w:tblW w:w="{9 * cell}" w:type="dxa"/><w:jc w:val="center"/>'
+            f'<w:tblLayout w:type="fixed"/></w:tblPr><w:tblGrid>'
+            + f'<w:gridCol w:w="{cell}"/>' * 9 + '</w:tblGrid>'
+        )
+        self.row_start = f'<w:tr><w:trPr><w:trHeight w:val="{cell}" w:hRule="exact"/></w:trPr>'
+
+    def xml(self, cells, givens=None):
+        parts = [self.table_start]
+        for i, value in enumerate(cells):
+            if i % 9 == 0:
+                parts.append(self.row_start)
+            parts.append(self.cell_start[i])
+            if value not in ".0":
+                parts.append(self.run[givens is None or givens[i] not in ".0"] + value + '</w:t></w:r>')
+            parts.append('</w:p></w:tc>')
+            if i % 9 == 8:
+                parts.append('</w:tr>')
+        parts.append('</w:tbl>')
+        return "".join(parts)
+
+
+def _docx_page(items, columns, grid, title):
+    """One page: title, then an invisible layout table holding `columns` grids per row"""
+    slot = (PAGE_W - 2 * PAGE_MARGIN) // columns
+    parts = [_paragraph(title, 32, bold=True),
+             f'<w:tbl><w:tblPr><w:tblW w:w="{slot * columns}" w:type="dxa"/><w:tblLayout w:type="fixed"/>'
+             f'{_NO_BORDERS}</w:tblPr><w:tblGrid>' + f'<w:gridCol w:w="{slot}"/>' * columns + '</w:tblGrid>']
+    for start in range(0, len(items), columns):
+        parts.append('<w:tr>')
+        row = items[start:start + columns]
+        for caption, cells, givens in row + [(None, None, None)] * (columns - len(row)):
+            parts.append(f'<w:tc><w:tcPr><w:tcW w:w="{slot}" w:type="dxa"/></w:tcPr>')
+            if cells is not None:
+                parts.append(_paragraph(caption, 20))
+                parts.append(grid.xml(cells, givens))
+            parts.append('<w:p/></w:tc>')
+        parts.append('</w:tr>')
+    parts.append('</w:tbl>')
+    return "".join(parts)
+
+
+def _docx_cell_size(columns, rows):
+    slot_w = (PAGE_W - 2 * PAGE_MARGIN) / columns
+    slot_h = (PAGE_H - 2 * PAGE_MARGIN - 900) / rows - 500
+    return int(min(slot_w, slot_h) * 0.9 / 9)
+
+
+def write_docx(puzzles, out, per_page=4, solutions=True, title="Sudoku"):
+    """Stream puzzles into a DOCX booklet; returns the number of puzzles written"""
+    columns, rows = LAYOUTS[per_page]
+    grid = _DocxGrid(_docx_cell_size(columns, rows))
+    kept = []
+    count = 0
+    pages = 0
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        package.writestr("_rels/.rels", _RELS)
+        with package.open("word/document.xml", "w") as doc:
+            doc.write(_DOC_START.encode("utf-8"))
+            for page in _pages(puzzles, per_page):
+                items = []
+                for puzzle, solution, caption in page:
+                    count += 1
+                    items.append((f"#{count}  {caption}", puzzle, None))
+                    if solutions:
+                        kept.append((puzzle, solution))
+                if pages:
+                    doc.write(_PAGE_BREAK.encode("utf-8"))
+                pages += 1
+                doc.write(_docx_page(items, columns, grid, f"{title} · page {pages}").encode("utf-8"))
+
+            if solutions and kept:
+                columns, rows = LAYOUTS[SOLUTIONS_PER_PAGE]
+                grid = _DocxGrid(_docx_cell_size(columns, rows))
+                number = 0
+                for page in _pages(kept, SOLUTIONS_PER_PAGE):
+                    items = []
+                    for puzzle, solution in page:
+                        number += 1
+                        items.append((f"#{number}", solution, puzzle))
+                    doc.write(_PAGE_BREAK.encode("utf-8"))
+                    doc.write(_docx_page(items, columns, grid, f"{title} · solutions").encode("utf-8"))
+            doc.write(_DOC_END.encode("utf-8"))
+    return count
+
+
+WRITERS = {'pdf': write_pdf, 'docx': write_docx}
+
+
+def write_booklet(puzzles, path, fmt=None, per_page=4, solutions=True, title="Sudoku"):
+    """Write a booklet to `path`; the format defaults to the file extension"""
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown booklet format {fmt!r}; choose from {', '.join(FORMATS)}")
+    if per_page not in LAYOUTS:
+        raise ValueError(f"Grids per page must be one of {', '.join(map(str, LAYOUTS))}")
+    with open(path, "wb") as out:
+        return WRITERS[fmt](puzzles, out, per_page, solutions, title)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lay out many Sudoku puzzles in one PDF or DOCX booklet")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--bank", help="take puzzles from a binary puzzle bank")
+    source.add_argument("--input", help="take puzzles from a text file (one puzzle per line)")
+    parser.add_argument("-n", "--count", type=int, default=None, help="number of puzzles (default: 100 when generating)")
+    parser.add_argument("-d", "--difficulty", choices=list(DIFFICULTY_LEVELS), default=None)
+    parser.add_argument("-o", "--output", required=True, help="booklet file, .pdf or .docx")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="default: from the output file name")
+    parser.add_argument("--per-page", type=int, choices=sorted(LAYOUTS), default=4)
+    parser.add_argument("--solutions", action="store_true", help="add a solutions appendix")
+    parser.add_argument("--title", default="Sudoku")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=None, help="base seed; puzzle k uses seed + k")
+    parser.add_argument("--backend", choices=list(SOLVER_BACKENDS), default=DEFAULT_BACKEND)
+    args = parser.parse_args(argv)
+    # The standard PDF fonts only cover Latin-1
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+    if fmt == 'pdf':
+        try:
+            args.title.encode("latin-1")
+        except UnicodeEncodeError:
+            parser.error("--title can only use Latin-1 characters in a PDF booklet")
+
+    if args.bank:
+        puzzles = bank_puzzles(args.bank, args.difficulty, args.count, args.seed)
+    elif args.input:
+        puzzles = text_puzzles(args.input, args.count)
+    else:
+        seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+        if seed_range_error(seed, args.count or 100):
+            parser.error(seed_range_error(seed, args.count or 100))
+        puzzles = seeded_puzzles(args.count or 100, args.difficulty or 'medium', seed, args.jobs, args.backend)
+
+    start = time.perf_counter()
+    done = write_booklet(puzzles, args.output, args.format, args.per_page, args.solutions, args.title)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {done} puzzles to {args.output} in {elapsed:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""SQLite-backed store that lets in-progress games survive server restarts.
+
+Each session's game is saved as one small binary blob keyed by a session
+ID kept in the page URL, so a browser that reconnects after a restart
+gets its game back. save() only records the latest state in memory; a
+daemon thread writes everything pending in one transaction every few
+seconds, so clicks never wait for the disk.
+
+Blob layout (little-endian):
+
+    header    version u8, difficulty code u8, backend code u8, flags u8,
+              hints u16, errors u16, moves applied u32, elapsed seconds f32,
+              moves logged u32, puzzle ID length u8
+    boards    puzzle and solution, 41 packed bytes each
+    puzzle ID UTF-8
+    move log  3 bytes per move, then one f32 time per move
+"""
+
+import atexit
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from array import array
+
+from puzzle_bank import (
+    DIFFICULTY_CODES, DIFFICULTY_NAMES, PACKED_BOARD_SIZE, UNRATED,
+    pack_board, unpack_board,
+)
+from sudoku_engine import SudokuGame
+from sudoku_solver import DEFAULT_BACKEND, SOLVER_BACKENDS
+
+STATE_VERSION = 1
+STATE_HEADER = struct.Struct("<BBBBHHIfIB")
+FINISHED = 0x01
+
+BACKEND_NAMES = list(SOLVER_BACKENDS)
+
+FLUSH_INTERVAL = 2.0
+MAX_AGE_DAYS = 30
+
+
+def _little_endian(values):
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode, data):
+    values = array(typecode, data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def pack_game(game):
+    """Serialize a SudokuGame to bytes (about 100 bytes plus 7 per move)"""
+    elapsed = game.get_elapsed_time() if game.end_time is None else game.end_time - game.start_time
+    puzzle_id = (getattr(game, 'puzzle_id', None) or "").encode("utf-8")
+    moves = len(game.move_times)
+    header = STATE_HEADER.pack(
+        STATE_VERSION,
+        DIFFICULTY_CODES.get(game.difficulty, UNRATED),
+        BACKEND_NAMES.index(game.solver_backend) if game.solver_backend in BACKEND_NAMES else 0,
+        FINISHED if game.end_time is not None else 0,
+        game.hints_used, game.errors, game.move_count, elapsed, moves, len(puzzle_id),
+    )
+    return b"".join((
+        header, pack_board(game.board), pack_board(game.solution), puzzle_id,
+        game.move_log[:3 * moves].tobytes(), _little_endian(game.move_times),
+    ))
+
+
+def unpack_game(data, game_class=SudokuGame):
+    """Rebuild a game of class `game_class` from pack_game bytes"""
+    (version, difficulty, backend, flags, hints, errors, applied, elapsed,
+     moves, id_length) = STATE_HEADER.unpack_from(data, 0)
+    if version != STATE_VERSION:
+        raise ValueError(f"Unsupported game state version {version}")
+    offset = STATE_HEADER.size
+    puzzle = unpack_board(data[offset:offset + PACKED_BOARD_SIZE])
+    offset += PACKED_BOARD_SIZE
+    solution = unpack_board(data[offset:offset + PACKED_BOARD_SIZE])
+    offset += PACKED_BOARD_SIZE
+    puzzle_id = data[offset:offset + id_length].decode("utf-8")
+    offset += id_length
+    move_log = array("B", data[offset:offset + 3 * moves])
+    offset += 3 * moves
+    move_times = _from_little_endian("f", data[offset:offset + 4 * moves])
+    if len(move_log) != 3 * moves or len(move_times) != moves or applied > moves:
+        raise ValueError("Truncated game state")
+
+    puzzle_args = (puzzle, solution, puzzle_id) if puzzle_id else (puzzle, solution)
+    game = game_class(
+        DIFFICULTY_NAMES[difficulty] if difficulty < len(DIFFICULTY_NAMES) else 'medium',
+        BACKEND_NAMES[backend] if backend < len(BACKEND_NAMES) else DEFAULT_BACKEND,
+        puzzle=puzzle_args,
+    )
+    game.restore_moves(move_log, move_times, applied)
+    game.hints_used = hints
+    game.errors = errors
+    # Time spent while the server was down does not count
+    game.start_time = time.time() - elapsed
+    game.end_time = game.start_time + elapsed if flags & FINISHED else None
+    return game
+
+
+class GameStore:
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS games ("
+            "session_id TEXT PRIMARY KEY, updated REAL NOT NULL, state BLOB NOT NULL)"
+        )
+        self._db.execute("DELETE FROM games WHERE updated < ?", (time.time() - MAX_AGE_DAYS * 86400,))
+        # Kept up to date by flush() so stats() never touches the database
+        self.stored = self._db.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+        self._db_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.writes = 0
+        self.flushes = 0
+        self.last_flush_ms = None
+
+    def start(self):
+        """Start the background flush thread (no-op if already running)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="game-store", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def save(self, session_id, game):
+        """Queue the game's current state; written on the next flush"""
+        state = pack_game(game)
+        with self._lock:
+            self._pending[session_id] = (time.time(), state)
+
+    def load(self, session_id, game_class=SudokuGame):
+        """The saved game for `session_id`, or None if there is none (or it is unreadable)"""
+        with self._lock:
+            pending = self._pending.get(session_id)
+        if pending is not None:
+            state = pending[1]
+        else:
+            with self._db_lock:
+                row = self._db.execute("SELECT state FROM games WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            state = row[0]
+        try:
+            return unpack_game(state, game_class)
+        except (ValueError, IndexError, struct.error):
+            return None
+
+    def flush(self):
+        """Write every pending state in one transaction"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        start = time.perf_counter()
+        rows = [(session_id, updated, state) for session_id, (updated, state) in pending.items()]
+        with self._db_lock:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO games VALUES (?, ?, ?)", rows)
+            self._db.execute("COMMIT")
+            self.stored = self._db.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+        self.writes += len(rows)
+        self.flushes += 1
+        self.last_flush_ms = round(1000 * (time.perf_counter() - start), 1)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def stats(self):
+        """Pending states, stored games (as of the last flush) and write counts"""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'pending': pending,
+            'stored': self.stored,
+            'writes': self.writes,
+            'flushes': self.flushes,
+            'last_flush_ms': self.last_flush_ms,
+        }
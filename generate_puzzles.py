@@ -0,0 +1,95 @@
+"""Generate a bank of puzzles from the command line using every CPU core.
+
+Each output line holds one puzzle:
+
+    <puzzle> <solution> <difficulty> <clues> <puzzle_id>
+
+where puzzle and solution are 81-character strings ('.' for blanks) and
+puzzle_id can be loaded in the app to regenerate the same puzzle.
+Lines are written as soon as each puzzle is finished, so large runs can
+be stopped at any time and still leave a usable file.
+
+Example:
+    python generate_puzzles.py -n 10000 -d expert -o expert.txt
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from sudoku_solver import (
+    DEFAULT_BACKEND, DIFFICULTY_LEVELS, SOLVER_BACKENDS, board_to_line,
+    SEED_LIMIT, generate_seeded_puzzle, make_puzzle_id,
+)
+
+HEADER = "# puzzle solution difficulty clues puzzle_id\n"
+
+
+def generate_line(difficulty, seed, backend=DEFAULT_BACKEND):
+    """Generate one seeded puzzle and return it as an output line"""
+    puzzle, solution = generate_seeded_puzzle(difficulty, seed, backend)
+    puzzle_line = board_to_line(puzzle)
+    clues = 81 - puzzle_line.count(".")
+    puzzle_id = make_puzzle_id(difficulty, seed)
+    return f"{puzzle_line} {board_to_line(solution)} {difficulty} {clues} {puzzle_id}\n"
+
+
+def seed_range_error(seed, count):
+    """Message if seeds seed .. seed + count - 1 do not all fit in puzzle IDs, else None"""
+    if not 0 <= seed <= SEED_LIMIT - count:
+        return f"--seed must be between 0 and {SEED_LIMIT - count} for {count} puzzles"
+    return None
+
+
+def generate_batch(count, difficulty, out, jobs=None, seed=None, backend=DEFAULT_BACKEND):
+    """Generate `count` puzzles across `jobs` processes, writing lines to `out`"""
+    jobs = jobs or os.cpu_count() or 1
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+
+    out.write(HEADER)
+    done = 0
+    next_index = 0
+    # Keep a bounded number of tasks in flight so memory stays flat for huge runs
+    max_pending = jobs * 4
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = set()
+        while done < count:
+            while next_index < count and len(pending) < max_pending:
+                pending.add(executor.submit(generate_line, difficulty, seed + next_index, backend))
+                next_index += 1
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                out.write(future.result())
+                done += 1
+            out.flush()
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Sudoku puzzles in parallel")
+    parser.add_argument("-n", "--count", type=int, default=100, help="number of puzzles")
+    parser.add_argument("-d", "--difficulty", choices=list(DIFFICULTY_LEVELS), default="medium")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=None, help="base seed; puzzle k uses seed + k")
+    parser.add_argument("--backend", choices=list(SOLVER_BACKENDS), default=DEFAULT_BACKEND)
+    args = parser.parse_args(argv)
+    if args.seed is not None and seed_range_error(args.seed, args.count):
+        parser.error(seed_range_error(args.seed, args.count))
+
+    start = time.perf_counter()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            done = generate_batch(args.count, args.difficulty, out, args.jobs, args.seed, args.backend)
+    else:
+        done = generate_batch(args.count, args.difficulty, sys.stdout, args.jobs, args.seed, args.backend)
+    elapsed = time.perf_counter() - start
+    print(f"Generated {done} {args.difficulty} puzzles in {elapsed:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
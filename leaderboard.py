@@ -0,0 +1,170 @@
+"""Local leaderboard of completed games, kept in SQLite.
+
+Results are written and leaderboards are read by a daemon thread; the
+app only ever touches in-memory snapshots, so drawing the sidebar never
+waits for the disk. A snapshot holds the top times for a difficulty (or
+one puzzle) and the cumulative distribution of solve times, so a
+player's percentile is a bisect instead of a COUNT over the table.
+
+Tables:
+
+    results      one row per completed game, indexed by
+                 (puzzle_id, seconds) and (difficulty, seconds)
+    time_counts  number of games per (difficulty, seconds); a few
+                 thousand rows per difficulty however many games are played
+"""
+
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+TOP_N = 10
+# Snapshots nobody has asked for in this long stop being refreshed
+SNAPSHOT_IDLE = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    puzzle_id TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    seconds INTEGER NOT NULL,
+    hints INTEGER NOT NULL,
+    mistakes INTEGER NOT NULL,
+    finished REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_puzzle_time ON results (puzzle_id, seconds);
+CREATE INDEX IF NOT EXISTS results_difficulty_time ON results (difficulty, seconds);
+CREATE TABLE IF NOT EXISTS time_counts (
+    difficulty TEXT NOT NULL,
+    seconds INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    PRIMARY KEY (difficulty, seconds)
+) WITHOUT ROWID;
+"""
+
+
+class Leaderboard:
+    def __init__(self, path, top_n=TOP_N):
+        self.path = path
+        self.top_n = top_n
+        self._pending = deque()
+        self._snapshots = {}
+        self._wanted = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._db = None
+        self.query_ms = None
+
+    def start(self):
+        """Start the background thread that owns the database (no-op if running)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="leaderboard", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def record(self, puzzle_id, difficulty, seconds, hints=0, mistakes=0):
+        """Queue a completed game; written by the background thread"""
+        with self._lock:
+            self._pending.append((puzzle_id, difficulty, int(seconds), hints, mistakes, time.time()))
+        self._wake.set()
+
+    def snapshot(self, difficulty=None, puzzle_id=None):
+        """Latest leaderboard for a difficulty or a single puzzle, or None until it is loaded.
+
+        A snapshot is a dict with 'top' (rows of puzzle_id, seconds, hints,
+        mistakes, finished), 'games', and for difficulties the sorted
+        'seconds' / 'cumulative' lists used by percentile().
+        """
+        key = ('puzzle', puzzle_id) if puzzle_id else ('difficulty', difficulty)
+        with self._lock:
+            self._wanted[key] = time.time()
+            snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            self._wake.set()
+        return snapshot
+
+    def percentile(self, seconds, difficulty):
+        """Share of recorded games of `difficulty` slower than `seconds` (0-100), or None"""
+        snapshot = self.snapshot(difficulty)
+        if not snapshot or not snapshot['games']:
+            return None
+        k = bisect_left(snapshot['seconds'], seconds + 1)
+        faster_or_equal = snapshot['cumulative'][k - 1] if k else 0
+        return round(100 * (snapshot['games'] - faster_or_equal) / snapshot['games'], 1)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(SCHEMA)
+        return db
+
+    def _write_pending(self):
+        with self._lock:
+            rows = list(self._pending)
+            self._pending.clear()
+        if not rows:
+            return set()
+        self._db.execute("BEGIN")
+        self._db.executemany(
+            "INSERT INTO results (puzzle_id, difficulty, seconds, hints, mistakes, finished)"
+            " VALUES (?, ?, ?, ?, ?, ?)", rows)
+        self._db.executemany(
+            "INSERT INTO time_counts VALUES (?, ?, 1)"
+            " ON CONFLICT (difficulty, seconds) DO UPDATE SET games = games + 1",
+            [(row[1], row[2]) for row in rows])
+        self._db.execute("COMMIT")
+        return {('difficulty', row[1]) for row in rows} | {('puzzle', row[0]) for row in rows}
+
+    def _load(self, key):
+        kind, value = key
+        column = 'puzzle_id' if kind == 'puzzle' else 'difficulty'
+        top = self._db.execute(
+            f"SELECT puzzle_id, seconds, hints, mistakes, finished FROM results"
+            f" WHERE {column} = ? ORDER BY seconds LIMIT ?",
+            (value, self.top_n)).fetchall()
+        if kind == 'puzzle':
+            games = self._db.execute("SELECT COUNT(*) FROM results WHERE puzzle_id = ?", (value,)).fetchone()[0]
+            return {'top': top, 'games': games}
+        seconds, cumulative, games = [], [], 0
+        for s, n in self._db.execute(
+                "SELECT seconds, games FROM time_counts WHERE difficulty = ? ORDER BY seconds", (value,)):
+            games += n
+            seconds.append(s)
+            cumulative.append(games)
+        return {'top': top, 'games': games, 'seconds': seconds, 'cumulative': cumulative}
+
+    def _run(self):
+        self._db = self._connect()
+        try:
+            while not self._stop.is_set():
+                self._wake.clear()
+                changed = self._write_pending()
+                now = time.time()
+                with self._lock:
+                    for key, asked in list(self._wanted.items()):
+                        if now - asked > SNAPSHOT_IDLE:
+                            del self._wanted[key]
+                            self._snapshots.pop(key, None)
+                    stale = [key for key in self._wanted if key in changed or key not in self._snapshots]
+                start = time.perf_counter()
+                for key in stale:
+                    snapshot = self._load(key)
+                    with self._lock:
+                        self._snapshots[key] = snapshot
+                if stale:
+                    self.query_ms = round(1000 * (time.perf_counter() - start) / len(stale), 2)
+                self._wake.wait(timeout=5)
+        finally:
+            self._db.close()
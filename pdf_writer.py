@@ -0,0 +1,158 @@
+"""Small dependency-free PDF writer for Sudoku grids.
+
+Pages are written to the output as soon as they are added, so a booklet
+of any length is produced with flat memory: only the byte offsets of the
+objects written so far are kept until close(). Every page shares one
+resource dictionary with the two standard fonts (Helvetica and
+Helvetica-Bold), which PDF viewers provide, so nothing is embedded.
+
+Grids are vector content: the line work for a given grid size is built
+once and reused, and only the digits are filled in per board.
+
+    with PdfWriter(open("out.pdf", "wb")) as pdf:
+        pdf.add_page(grid_ops(50, 300, 495, puzzle_line) + text_ops(50, 800, "Puzzle", 18))
+"""
+
+import zlib
+from functools import lru_cache
+
+A4 = (595.0, 842.0)
+
+# Fixed object numbers; pages are numbered from FIRST_PAGE_OBJECT upwards
+CATALOG, PAGES, REGULAR_FONT, BOLD_FONT, RESOURCES = 1, 2, 3, 4, 5
+FIRST_PAGE_OBJECT = 6
+
+# Helvetica digits are 556/1000 em wide, caps about 718/1000 em tall
+DIGIT_WIDTH = 0.556
+CAP_HEIGHT = 0.718
+
+THIN_LINE = 0.5
+THICK_LINE = 1.8
+
+
+class PdfWriter:
+    def __init__(self, out, page_size=A4, compress=True):
+        self.out = out
+        self.page_size = page_size
+        self.compress = compress
+        self._offsets = {}
+        self._position = 0
+        self._pages = []
+        self._next_object = FIRST_PAGE_OBJECT
+        self._closed = False
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(REGULAR_FONT, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        self._object(BOLD_FONT, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+        self._object(RESOURCES, b"<< /Font << /F1 %d 0 R /F2 %d 0 R >> >>" % (REGULAR_FONT, BOLD_FONT))
+
+    def _write(self, data):
+        self.out.write(data)
+        self._position += len(data)
+
+    def _object(self, number, body):
+        self._offsets[number] = self._position
+        self._write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    def add_page(self, content):
+        """Write one page; `content` is a string of PDF drawing operators"""
+        data = content.encode("latin-1")
+        if self.compress:
+            data = zlib.compress(data)
+            header = b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(data)
+        else:
+            header = b"<< /Length %d >>\nstream\n" % len(data)
+        stream, page = self._next_object, self._next_object + 1
+        self._next_object += 2
+        self._object(stream, header + data + b"\nendstream")
+        width, height = self.page_size
+        self._object(page, b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %s %s] /Resources %d 0 R /Contents %d 0 R >>"
+                     % (PAGES, _num(width).encode(), _num(height).encode(), RESOURCES, stream))
+        self._pages.append(page)
+
+    @property
+    def page_count(self):
+        return len(self._pages)
+
+    def close(self):
+        """Write the page tree, cross-reference table and trailer"""
+        if self._closed:
+            return
+        self._closed = True
+        kids = b" ".join(b"%d 0 R" % page for page in self._pages)
+        self._object(PAGES, b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(self._pages))
+        self._object(CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % PAGES)
+        xref = self._position
+        size = self._next_object
+        entries = [b"0000000000 65535 f \n"]
+        for number in range(1, size):
+            entries.append(b"%010d 00000 n \n" % self._offsets[number])
+        self._write(b"xref\n0 %d\n" % size + b"".join(entries))
+        self._write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, CATALOG, xref))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _num(value):
+    """Compact number for content streams: at most two decimals, no trailing zeros"""
+    text = f"{value:.2f}".rstrip("0").rstrip(".")
+    return text if text != "-0" else "0"
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def text_ops(x, y, text, size, bold=False):
+    """Draw one line of text with its baseline starting at (x, y)"""
+    font = "F2" if bold else "F1"
+    return f"BT /{font} {_num(size)} Tf {_num(x)} {_num(y)} Td ({_escape(text)}) Tj ET\n"
+
+
+@lru_cache(maxsize=32)
+def _grid_geometry(size):
+    """Line work and digit positions for a grid `size` points wide, origin at its bottom-left"""
+    cell = size / 9
+    thin, thick = [], []
+    for k in range(10):
+        offset = _num(k * cell)
+        lines = thick if k % 3 == 0 else thin
+        lines.append(f"{offset} 0 m {offset} {_num(size)} l")
+        lines.append(f"0 {offset} m {_num(size)} {offset} l")
+    lines = (f"{_num(THIN_LINE)} w\n" + "\n".join(thin) + " S\n"
+             f"{_num(THICK_LINE)} w\n" + "\n".join(thick) + " S\n")
+    font_size = cell * 0.6
+    positions = []
+    for i in range(81):
+        row, col = divmod(i, 9)
+        x = col * cell + (cell - DIGIT_WIDTH * font_size) / 2
+        y = (8 - row) * cell + (cell - CAP_HEIGHT * font_size) / 2
+        positions.append(f"{_num(x)} {_num(y)} Tm")
+    return lines, _num(font_size), positions
+
+
+def grid_ops(x, y, size, cells, givens=None):
+    """Draw a 9x9 grid with its bottom-left corner at (x, y).
+
+    `cells` is an 81-character line ('.' or '0' for blanks) or 81 ints.
+    Digits at positions that are given in `givens` (same forms) are bold;
+    without `givens` every digit is bold, as for a puzzle.
+    """
+    lines, font_size, positions = _grid_geometry(round(size, 2))
+    ops = [f"q 1 0 0 1 {_num(x)} {_num(y)} cm\n", lines]
+    regular, bold = [], []
+    for i, value in enumerate(cells):
+        value = str(value)
+        if value in ".0":
+            continue
+        is_given = givens is None or str(givens[i]) not in ".0"
+        (bold if is_given else regular).append(f"1 0 0 1 {positions[i]} ({value}) Tj")
+    if bold:
+        ops.append(f"BT /F2 {font_size} Tf\n" + "\n".join(bold) + "\nET\n")
+    if regular:
+        ops.append(f"BT /F1 {font_size} Tf\n" + "\n".join(regular) + "\nET\n")
+    ops.append("Q\n")
+    return "".join(ops)
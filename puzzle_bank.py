@@ -0,0 +1,240 @@
+"""Compact binary puzzle bank read through mmap.
+
+File layout (all integers little-endian):
+
+    header   16 bytes   magic b"SDKB", version u16, record size u16,
+                        record count u32, index offset u32
+    records  84 bytes each: difficulty code u8, clue count u8,
+                        puzzle and solution as 81 packed 4-bit cells
+                        (41 bytes each, two cells per byte)
+    index    for every difficulty code, then for every clue count
+                        (keyed CLUE_KEY + clues): key u8, count u32,
+                        then that many record numbers u32
+
+Record k lives at a fixed offset, so any puzzle can be read without
+touching the rest of the file. The index lets a server pick a random
+puzzle of a given difficulty or clue count in O(1). Readers skip index
+keys they do not know, so banks with and without the clue entries can be
+read by either version of this module.
+
+Convert between the text form and a bank with:
+    python puzzle_bank.py pack expert.txt expert.sdkb
+    python puzzle_bank.py unpack expert.sdkb expert.txt
+"""
+
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+
+from sudoku_solver import (
+    DEFAULT_BACKEND, DIFFICULTY_LEVELS, board_to_line, flatten_board, generate_puzzle,
+    line_to_board, solve, to_rows,
+)
+
+MAGIC = b"SDKB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+PACKED_BOARD_SIZE = 41
+RECORD_SIZE = 2 + 2 * PACKED_BOARD_SIZE
+
+DIFFICULTY_CODES = {name: code for code, name in enumerate(DIFFICULTY_LEVELS)}
+DIFFICULTY_NAMES = list(DIFFICULTY_LEVELS)
+UNRATED = 255
+# Clue-count index keys start here, clear of the difficulty codes
+CLUE_KEY = 100
+
+# Byte -> (high nibble, low nibble)
+_NIBBLES = [(b >> 4, b & 0x0F) for b in range(256)]
+
+
+def pack_board(board):
+    """Pack 81 cells into 41 bytes, two 4-bit cells per byte"""
+    cells = flatten_board(board) + [0]
+    return bytes((cells[k] << 4) | cells[k + 1] for k in range(0, 82, 2))
+
+
+def unpack_board(data):
+    """Inverse of pack_board; returns 9x9 rows"""
+    cells = []
+    for b in data:
+        cells.extend(_NIBBLES[b])
+    return to_rows(cells[:81])
+
+
+class PuzzleBankWriter:
+    """Stream puzzles into a new bank file; use as a context manager"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, 0, 0))
+        self.count = 0
+        self._index = {code: array("I") for code in list(DIFFICULTY_CODES.values()) + [UNRATED]}
+        self._clue_index = {}
+
+    def add(self, puzzle, solution, difficulty=None):
+        code = DIFFICULTY_CODES.get(difficulty, UNRATED)
+        clues = sum(1 for value in flatten_board(puzzle) if value)
+        self._file.write(bytes((code, clues)) + pack_board(puzzle) + pack_board(solution))
+        self._index[code].append(self.count)
+        self._clue_index.setdefault(CLUE_KEY + clues, array("I")).append(self.count)
+        self.count += 1
+
+    def close(self):
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        for code, ids in sorted(self._index.items()) + sorted(self._clue_index.items()):
+            self._file.write(struct.pack("<BI", code, len(ids)))
+            self._file.write(ids.tobytes() if sys.byteorder == "little" else _swapped(ids))
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, self.count, index_offset))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _swapped(ids):
+    ids = array("I", ids)
+    ids.byteswap()
+    return ids.tobytes()
+
+
+class PuzzleBank:
+    """Read-only, memory-mapped view of a bank file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, count, index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+            raise ValueError(f"{path} is not a version {VERSION} puzzle bank")
+        self.count = count
+        self._index = self._read_index(index_offset)
+
+    def _read_index(self, offset):
+        """Map index key -> memoryview of record numbers (no copying)"""
+        index = {}
+        while offset < len(self._map):
+            code, n = struct.unpack_from("<BI", self._map, offset)
+            offset += 5
+            view = memoryview(self._map)[offset:offset + 4 * n]
+            index[code] = view.cast("I") if sys.byteorder == "little" else array("I", view.tobytes())
+            offset += 4 * n
+        return index
+
+    def __len__(self):
+        return self.count
+
+    def _record(self, k):
+        if not 0 <= k < self.count:
+            raise IndexError(k)
+        start = HEADER.size + k * RECORD_SIZE
+        return self._map[start:start + RECORD_SIZE]
+
+    def get(self, k):
+        """Return (puzzle, solution, difficulty, clues) for record k"""
+        record = self._record(k)
+        code, clues = record[0], record[1]
+        puzzle = unpack_board(record[2:2 + PACKED_BOARD_SIZE])
+        solution = unpack_board(record[2 + PACKED_BOARD_SIZE:])
+        difficulty = DIFFICULTY_NAMES[code] if code < len(DIFFICULTY_NAMES) else None
+        return puzzle, solution, difficulty, clues
+
+    def ids_for(self, difficulty):
+        """Record numbers of every puzzle with the given difficulty"""
+        return self._index.get(DIFFICULTY_CODES.get(difficulty, UNRATED), ())
+
+    def ids_with_clues(self, clues):
+        """Record numbers of every puzzle with exactly `clues` givens"""
+        if not any(key >= CLUE_KEY and key != UNRATED for key in self._index):
+            self._index_clues()
+        return self._index.get(CLUE_KEY + clues, ())
+
+    def _index_clues(self):
+        """Build the clue index in memory for banks packed without one"""
+        clue_counts = self._map[HEADER.size + 1:HEADER.size + self.count * RECORD_SIZE:RECORD_SIZE]
+        for k, clues in enumerate(clue_counts):
+            self._index.setdefault(CLUE_KEY + clues, array("I")).append(k)
+
+    def random_puzzle(self, difficulty, rng, backend=DEFAULT_BACKEND):
+        """(puzzle, solution) of a random puzzle of that difficulty.
+
+        Same signature as sudoku_solver.generate_puzzle, so a bank can feed
+        the PuzzlePool. Banked puzzles are already checked, so `backend`
+        only matters for the fallback to live generation when the bank has
+        no puzzles of that difficulty.
+        """
+        ids = self.ids_for(difficulty)
+        if not len(ids):
+            return generate_puzzle(difficulty, rng, backend)
+        puzzle, solution, _, _ = self.get(ids[rng.randrange(len(ids))])
+        return puzzle, solution
+
+    def close(self):
+        for view in self._index.values():
+            if isinstance(view, memoryview):
+                view.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def pack_text(src, dest):
+    """Build a bank from text lines: puzzle [solution [difficulty ...]].
+
+    Puzzles are 81-character lines as written by generate_puzzles.py or
+    export_to_simple_text ('.' or '0' for blanks). Missing solutions are
+    filled in with the solver. Returns the number of puzzles written.
+    """
+    with open(src, encoding="utf-8") as lines, PuzzleBankWriter(dest) as writer:
+        for line in lines:
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+            puzzle = line_to_board(fields[0])
+            solution = line_to_board(fields[1]) if len(fields) > 1 else solve(puzzle)
+            if solution is None:
+                raise ValueError(f"Puzzle has no solution: {fields[0]}")
+            writer.add(puzzle, solution, fields[2] if len(fields) > 2 else None)
+        return writer.count
+
+
+def unpack_text(src, dest):
+    """Write a bank back out as text lines: puzzle solution difficulty clues"""
+    with PuzzleBank(src) as bank, open(dest, "w", encoding="utf-8") as out:
+        out.write("# puzzle solution difficulty clues\n")
+        for k in range(len(bank)):
+            puzzle, solution, difficulty, clues = bank.get(k)
+            out.write(f"{board_to_line(puzzle)} {board_to_line(solution)} {difficulty or 'unrated'} {clues}\n")
+        return len(bank)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert between text puzzle lists and binary puzzle banks")
+    parser.add_argument("command", choices=["pack", "unpack"])
+    parser.add_argument("source")
+    parser.add_argument("dest")
+    args = parser.parse_args(argv)
+
+    if args.command == "pack":
+        count = pack_text(args.source, args.dest)
+    else:
+        count = unpack_text(args.source, args.dest)
+    print(f"Converted {count} puzzles", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Import puzzles from the common plain-text Sudoku formats.
+
+Recognised input, which may be mixed in one file:
+
+    81-character lines   one puzzle per line, '.' or '0' for blanks; extra
+                         fields after the puzzle are ignored (.txt, .sdm,
+                         and files written by generate_puzzles.py)
+    .sdk grids           nine rows of nine cells; '#' lines (author,
+                         description, ...) and '|', '-', '+' rules skipped
+
+Files are read line by line and each puzzle is checked as soon as it is
+complete, so memory use does not grow with the file. A puzzle is kept
+only if its givens do not repeat a digit and it has exactly one solution.
+
+Bulk import, written as text lines or straight into a binary bank:
+
+    python puzzle_import.py top95.sdm -o top95.txt
+    python puzzle_import.py big.txt -o big.sdkb --rejects rejected.txt
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+
+from puzzle_bank import PuzzleBankWriter
+from sudoku_engine import SudokuGame
+from sudoku_grader import grade, rating_distance
+from sudoku_solver import (
+    DEFAULT_BACKEND, DIFFICULTY_LEVELS, SOLVER_BACKENDS, board_to_line,
+    line_to_board, make_solver,
+)
+
+CELL_CHARS = frozenset("0123456789.")
+# Grid rules and padding inside .sdk rows
+RULE_CHARS = str.maketrans("", "", "|+- \t")
+
+HEADER = "# puzzle solution difficulty clues\n"
+# Puzzles checked per worker task in bulk imports
+CHUNK_SIZE = 500
+
+
+def read_puzzles(lines):
+    """Yield (line_number, puzzle, error) for every puzzle in a stream of text lines.
+
+    `puzzle` is an 81-character line with '.' for blanks, or None when
+    the input around `line_number` could not be read (then `error` says
+    why). Grids are reported at the line of their last row.
+    """
+    rows = []
+    for number, line in enumerate(lines, 1):
+        text = line.strip()
+        if not text or text.startswith("#"):
+            continue
+        first = text.split()[0]
+        cells = first if len(first) == 81 else text.translate(RULE_CHARS)
+        if not cells:
+            continue
+        if len(cells) not in (9, 81) or not CELL_CHARS.issuperset(cells):
+            yield number, None, f"Not a puzzle line: {text[:40]}"
+            continue
+        if len(cells) == 81:
+            if rows:
+                yield number - 1, None, f"Grid ends after {len(rows)} rows"
+                rows = []
+            yield number, cells.replace("0", "."), None
+            continue
+        rows.append(cells)
+        if len(rows) == 9:
+            yield number, "".join(rows).replace("0", "."), None
+            rows = []
+    if rows:
+        yield number, None, f"Grid ends after {len(rows)} rows"
+
+
+def difficulty_for(rating):
+    """Difficulty level whose rating range holds `rating`, as generation grades it.
+
+    Ratings between two ranges go to the closer level.
+    """
+    return min(DIFFICULTY_LEVELS, key=lambda level: rating_distance(rating, level))
+
+
+def check_puzzle(puzzle, backend=DEFAULT_BACKEND):
+    """Validate one 81-character puzzle; returns (solution_line, None) or (None, error)"""
+    solver = make_solver(line_to_board(puzzle), backend)
+    if not solver.valid:
+        return None, "Givens repeat a digit"
+    count = solver.count_solutions(2)
+    if count == 0:
+        return None, "No solution"
+    if count > 1:
+        return None, "More than one solution"
+    return board_to_line(solver.solve()), None
+
+
+def import_puzzles(lines, backend=DEFAULT_BACKEND):
+    """Yield (line_number, puzzle, solution, error) for every puzzle in `lines`.
+
+    Valid puzzles come with their solution line and error None; rejected
+    ones with solution None and the reason.
+    """
+    for number, puzzle, error in read_puzzles(lines):
+        solution = None
+        if puzzle is not None:
+            solution, error = check_puzzle(puzzle, backend)
+        yield number, puzzle, solution, error
+
+
+def game_from_puzzle(puzzle, solution=None, game_class=SudokuGame):
+    """Start a SudokuGame on an imported puzzle line, labelled by its grader rating.
+
+    Raises ValueError when `solution` is missing and the puzzle is not valid.
+    """
+    if solution is None:
+        solution, error = check_puzzle(puzzle)
+        if error:
+            raise ValueError(error)
+    board = line_to_board(puzzle)
+    rating, _ = grade(board)
+    # The puzzle line is the ID, as for every puzzle not generated from a seed
+    return game_class(difficulty_for(rating), puzzle=(board, line_to_board(solution), puzzle))
+
+
+def text_lines(data):
+    """Text lines of an uploaded or opened binary file, decoded as it is read.
+
+    utf-8-sig drops the byte order mark some editors write, which would
+    otherwise make the first puzzle line invalid.
+    """
+    return io.TextIOWrapper(data, encoding="utf-8-sig", errors="replace")
+
+
+def _check_chunk(chunk, backend, rate):
+    """Worker task: (number, puzzle, solution, difficulty, clues, error) per parsed entry"""
+    results = []
+    for number, puzzle, error in chunk:
+        solution = level = None
+        if puzzle is not None:
+            solution, error = check_puzzle(puzzle, backend)
+        if solution and rate:
+            level = difficulty_for(grade(line_to_board(puzzle))[0])
+        results.append((number, puzzle, solution, level, 81 - puzzle.count(".") if puzzle else 0, error))
+    return results
+
+
+def _chunks(items):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def bulk_import(lines, add, reject, jobs=None, backend=DEFAULT_BACKEND, rate=True):
+    """Check every puzzle in `lines` across `jobs` processes, in input order.
+
+    `add(puzzle, solution, difficulty, clues)` receives each valid puzzle
+    (difficulty None when `rate` is off; grading takes about as long as
+    validating, so skipping it roughly halves the time) and
+    `reject(line_number, puzzle, error)` everything else. Only a bounded
+    window of chunks is in flight, so memory stays flat however long the
+    input is. Returns (imported, rejected).
+    """
+    jobs = jobs or os.cpu_count() or 1
+    imported = rejected = 0
+    chunks = _chunks(read_puzzles(lines))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        window = deque()
+        while True:
+            while len(window) < jobs * 4:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                window.append(executor.submit(_check_chunk, chunk, backend, rate))
+            if not window:
+                break
+            for number, puzzle, solution, level, clues, error in window.popleft().result():
+                if error:
+                    rejected += 1
+                    reject(number, puzzle, error)
+                else:
+                    imported += 1
+                    add(puzzle, solution, level, clues)
+    return imported, rejected
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate and import puzzles from .txt, .sdk or .sdm files")
+    parser.add_argument("inputs", nargs="+", help="puzzle files ('-' for stdin)")
+    parser.add_argument("-o", "--output", help="text file, or a .sdkb puzzle bank (default: stdout)")
+    parser.add_argument("--rejects", help="write rejected puzzles and the reason here")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--backend", choices=list(SOLVER_BACKENDS), default=DEFAULT_BACKEND)
+    parser.add_argument("--no-grade", action="store_true", help="leave puzzles unrated (about twice as fast)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    imported = rejected = 0
+    with ExitStack() as stack:
+        if args.output and args.output.endswith(".sdkb"):
+            writer = stack.enter_context(PuzzleBankWriter(args.output))
+            add = lambda puzzle, solution, level, clues: writer.add(
+                line_to_board(puzzle), line_to_board(solution), level)
+        else:
+            out = stack.enter_context(open(args.output, "w", encoding="utf-8")) if args.output else sys.stdout
+            out.write(HEADER)
+            add = lambda puzzle, solution, level, clues: out.write(f"{puzzle} {solution} {level or 'unrated'} {clues}\n")
+        rejects_out = stack.enter_context(open(args.rejects, "w", encoding="utf-8")) if args.rejects else None
+
+        for path in args.inputs:
+            def reject(number, puzzle, error):
+                if rejects_out:
+                    rejects_out.write(f"{path}:{number}: {error}: {puzzle or '-'}\n")
+
+            if path == "-":
+                counts = bulk_import(sys.stdin, add, reject, args.jobs, args.backend, not args.no_grade)
+            else:
+                with open(path, encoding="utf-8-sig", errors="replace") as lines:
+                    counts = bulk_import(lines, add, reject, args.jobs, args.backend, not args.no_grade)
+            imported += counts[0]
+            rejected += counts[1]
+    elapsed = time.perf_counter() - start
+    print(f"Imported {imported} puzzles, rejected {rejected}, in {elapsed:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
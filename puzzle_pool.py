@@ -0,0 +1,127 @@
+"""Process-wide pool of ready-made puzzles, one queue per difficulty and solver backend.
+
+A daemon thread keeps every queue topped up to a high-water mark so that
+"New Game" only has to pop a puzzle. When a queue runs dry the puzzle is
+generated on the caller's thread instead (a miss). Queues for the default
+backend exist from the start; a queue for another backend is added the
+first time a game asks for one.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+from sudoku_solver import DEFAULT_BACKEND, DIFFICULTY_LEVELS, SOLVER_BACKENDS, generate_puzzle
+
+log = logging.getLogger(__name__)
+
+# Pause after a failed refill so a persistent error does not spin the thread
+ERROR_BACKOFF = 1.0
+
+
+class PuzzlePool:
+    def __init__(self, high_water=10, difficulties=None, generate=generate_puzzle):
+        """`generate(difficulty, rng, backend)` makes one puzzle"""
+        self.high_water = high_water
+        self.difficulties = list(difficulties or DIFFICULTY_LEVELS)
+        self._generate = generate
+        self._queues = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._rng = random.Random()
+        self.hits = {}
+        self.misses = {}
+        # Recent background generation times in seconds
+        self.refill_times = {}
+        self.refill_errors = 0
+        for difficulty in self.difficulties:
+            self._add_queue((difficulty, DEFAULT_BACKEND))
+
+    def _add_queue(self, key):
+        """Start pooling `key` = (difficulty, backend); call with the lock held or before start()"""
+        self._queues[key] = deque()
+        self.hits[key] = 0
+        self.misses[key] = 0
+        self.refill_times[key] = deque(maxlen=50)
+
+    def start(self):
+        """Start the background refill thread (no-op if already running)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="puzzle-pool", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def get(self, difficulty, backend=DEFAULT_BACKEND):
+        """Return a puzzle for `difficulty` checked by `backend`, from the pool when possible"""
+        key = (difficulty, backend)
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is None and difficulty in self.difficulties and backend in SOLVER_BACKENDS:
+                self._add_queue(key)
+            if queue:
+                self.hits[key] += 1
+                puzzle = queue.popleft()
+            else:
+                if key in self.misses:
+                    self.misses[key] += 1
+                puzzle = None
+        self._wake.set()
+        if puzzle is None:
+            # Pool is empty: generate on the caller's thread
+            puzzle = self._generate(difficulty, random.Random(), backend)
+        return puzzle
+
+    def _next_to_refill(self):
+        """(difficulty, backend) whose queue is furthest below the high-water mark"""
+        with self._lock:
+            sizes = {key: len(q) for key, q in self._queues.items()}
+        key = min(sizes, key=sizes.get)
+        return key if sizes[key] < self.high_water else None
+
+    def _run(self):
+        while not self._stop.is_set():
+            key = self._next_to_refill()
+            if key is None:
+                # Everything is full: sleep until someone takes a puzzle
+                self._wake.wait(timeout=5)
+                self._wake.clear()
+                continue
+
+            start = time.perf_counter()
+            try:
+                puzzle = self._generate(key[0], self._rng, key[1])
+            except Exception:
+                # Keep the thread alive; get() falls back to the caller meanwhile
+                log.exception("Puzzle pool refill failed for %s/%s", *key)
+                self.refill_errors += 1
+                self._stop.wait(ERROR_BACKOFF)
+                continue
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._queues[key].append(puzzle)
+                self.refill_times[key].append(elapsed)
+
+    def stats(self):
+        """Pool size, hit/miss counts and mean refill time in ms per (difficulty, backend)"""
+        with self._lock:
+            stats = {}
+            for key, queue in self._queues.items():
+                times = self.refill_times[key]
+                stats[key] = {
+                    'size': len(queue),
+                    'hits': self.hits[key],
+                    'misses': self.misses[key],
+                    'refill_ms': round(1000 * sum(times) / len(times), 1) if times else None,
+                }
+            return stats
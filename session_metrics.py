@@ -0,0 +1,63 @@
+"""Per-session server load metrics kept in st.session_state."""
+
+import sys
+import time
+from collections import deque
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+RERUN_WINDOW = 60
+
+
+def record_rerun(state):
+    """Call once at the top of every script run"""
+    runs = state.setdefault('rerun_times', deque())
+    now = time.time()
+    runs.append(now)
+    while now - runs[0] > RERUN_WINDOW:
+        runs.popleft()
+
+
+def record_fragment_rerun(state):
+    """Call at the top of every fragment; counts the run only when just the
+    fragments rerun, since a full script run was already counted"""
+    ctx = get_script_run_ctx()
+    if ctx is not None and ctx.fragment_ids_this_run:
+        record_rerun(state)
+
+
+def reruns_per_minute(state):
+    """Script and fragment runs of this session during the last minute"""
+    return len(state.get('rerun_times', ()))
+
+
+def deep_sizeof(obj, seen=None):
+    """Approximate bytes held by obj and everything it references.
+
+    Follows containers, __dict__ and __slots__; NumPy arrays report their
+    own buffer through sys.getsizeof. Shared objects are counted once.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif not isinstance(obj, (str, bytes, bytearray, int, float)):
+        if hasattr(obj, '__dict__'):
+            size += deep_sizeof(vars(obj), seen)
+        for cls in type(obj).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if hasattr(obj, name):
+                    size += deep_sizeof(getattr(obj, name), seen)
+    return size
+
+
+def session_bytes(state):
+    """Approximate memory held by one session's state, for sizing servers"""
+    seen = set()
+    return sum(deep_sizeof(key, seen) + deep_sizeof(state[key], seen) for key in list(state.keys()))
@@ -1,7 +1,13 @@
 import streamlit as st
-import numpy as np
-import random
-import time
+
+from app_common import (
+    apply_board_event, get_game_store, get_leaderboard, get_puzzle_pool,
+    leaderboard_expander, puzzle_pool_expander, redo_move, save_game,
+    session_id, undo_move,
+)
+from sudoku_engine import SudokuGame, export
+from sudoku_solver import DEFAULT_BACKEND, SOLVER_BACKENDS
+from sudoku_board import live_timer, sudoku_board
 
 
 # Set page configuration
@@ -132,174 +138,11 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-class SudokuGame:
-    def __init__(self, difficulty='medium'):
-        self.difficulty = difficulty
-        self.board = None
-        self.solution = None
-        self.user_board = None
-        self.start_time = None
-        self.end_time = None
-        self.hints_used = 0
-        self.errors = 0
-        self.generate_new_puzzle()
-    
-    def generate_new_puzzle(self):
-        # Generate a complete Sudoku solution
-        self.solution = self.generate_solution()
-        
-        # Create puzzle by removing numbers based on difficulty
-        self.board = np.copy(self.solution)
-        self.user_board = np.copy(self.board)
-        
-        # Number of cells to remove based on difficulty
-        difficulty_levels = {
-            'easy': 35,
-            'medium': 45,
-            'hard': 50,
-            'expert': 55
-        }
-        
-        cells_to_remove = difficulty_levels.get(self.difficulty, 45)
-        
-        # Remove numbers randomly
-        all_positions = [(i, j) for i in range(9) for j in range(9)]
-        random.shuffle(all_positions)
-        
-        removed = 0
-        for i, j in all_positions:
-            if removed >= cells_to_remove:
-                break
-            
-            temp = self.board[i][j]
-            self.board[i][j] = 0
-            self.user_board[i][j] = 0
-            
-            if self.has_unique_solution():
-                removed += 1
-            else:
-                self.board[i][j] = temp
-                self.user_board[i][j] = temp
-        
-        self.start_time = time.time()
-        self.end_time = None
-        self.hints_used = 0
-        self.errors = 0
-    
-    def generate_solution(self):
-        board = np.zeros((9, 9), dtype=int)
-        
-        def fill_board(board, row=0, col=0):
-            if row == 9:
-                return True
-            if col == 9:
-                return fill_board(board, row + 1, 0)
-            if board[row][col] != 0:
-                return fill_board(board, row, col + 1)
-            
-            numbers = list(range(1, 10))
-            random.shuffle(numbers)
-            
-            for num in numbers:
-                if self.is_valid(board, row, col, num):
-                    board[row][col] = num
-                    if fill_board(board, row, col + 1):
-                        return True
-                    board[row][col] = 0
-            return False
-        
-        # Fill diagonal boxes first
-        for i in range(0, 9, 3):
-            numbers = list(range(1, 10))
-            random.shuffle(numbers)
-            for r in range(3):
-                for c in range(3):
-                    board[i + r][i + c] = numbers.pop()
-        
-        fill_board(board)
-        return board
-    
-    def is_valid(self, board, row, col, num):
-        if num in board[row]:
-            return False
-        if num in board[:, col]:
-            return False
-        box_row = (row // 3) * 3
-        box_col = (col // 3) * 3
-        if num in board[box_row:box_row+3, box_col:box_col+3]:
-            return False
-        return True
-    
-    def has_unique_solution(self):
-        board_copy = np.copy(self.board)
-        
-        def count_solutions(board, count=0):
-            for i in range(9):
-                for j in range(9):
-                    if board[i][j] == 0:
-                        for num in range(1, 10):
-                            if self.is_valid(board, i, j, num):
-                                board[i][j] = num
-                                count = count_solutions(board, count)
-                                if count > 1:
-                                    return count
-                                board[i][j] = 0
-                        return count
-            return count + 1
-        
-        return count_solutions(board_copy) == 1
-    
-    def get_hint(self):
-        empty_cells = []
-        for i in range(9):
-            for j in range(9):
-                if self.user_board[i][j] == 0:
-                    empty_cells.append((i, j))
-        
-        if empty_cells:
-            row, col = random.choice(empty_cells)
-            self.user_board[row][col] = self.solution[row][col]
-            self.hints_used += 1
-            return row, col
-        return None
-    
-    def check_solution(self):
-        for i in range(9):
-            for j in range(9):
-                if self.user_board[i][j] != self.solution[i][j]:
-                    return False
-        self.end_time = time.time()
-        return True
-    
-    def check_errors(self):
-        errors = []
-        for i in range(9):
-            for j in range(9):
-                if self.user_board[i][j] != 0:
-                    temp = self.user_board[i][j]
-                    self.user_board[i][j] = 0
-                    
-                    if not self.is_valid(self.user_board, i, j, temp):
-                        errors.append((i, j))
-                    
-                    self.user_board[i][j] = temp
-        return errors
-    
-    def get_elapsed_time(self):
-        if self.start_time is None:
-            return 0
-        if self.end_time is not None:
-            return int(self.end_time - self.start_time)
-        return int(time.time() - self.start_time)
-    
-    def format_time(self, seconds):
-        minutes = seconds // 60
-        seconds = seconds % 60
-        return f"{minutes:02d}:{seconds:02d}"
-
 # Initialize session state
 if 'game' not in st.session_state:
-    st.session_state.game = SudokuGame()
+    # A returning tab picks its game up from the session store
+    st.session_state.game = (get_game_store().load(session_id())
+                             or SudokuGame(puzzle=get_puzzle_pool().get('medium')))
 if 'show_errors' not in st.session_state:
     st.session_state.show_errors = False
 if 'show_hint' not in st.session_state:
@@ -307,7 +150,7 @@ if 'show_hint' not in st.session_state:
 if 'hint_cell' not in st.session_state:
     st.session_state.hint_cell = None
 if 'game_over' not in st.session_state:
-    st.session_state.game_over = False
+    st.session_state.game_over = st.session_state.game.end_time is not None
 if 'selected_cell' not in st.session_state:
     st.session_state.selected_cell = None
 
@@ -326,9 +169,16 @@ with st.sidebar:
         index=1
     )
     
+    # Solver engine used for generation and uniqueness checks
+    solver_backend = st.selectbox(
+        "Solver",
+        list(SOLVER_BACKENDS),
+        index=list(SOLVER_BACKENDS).index(DEFAULT_BACKEND)
+    )
+    
     # New game
     if st.button("🔄 New Game", type="primary", use_container_width=True):
-        st.session_state.game = SudokuGame(difficulty)
+        st.session_state.game = SudokuGame(difficulty, solver_backend, puzzle=get_puzzle_pool().get(difficulty, solver_backend))
         st.session_state.show_errors = False
         st.session_state.show_hint = False
         st.session_state.hint_cell = None
@@ -367,6 +217,9 @@ with st.sidebar:
         if not st.session_state.game_over:
             if st.session_state.game.check_solution():
                 st.session_state.game_over = True
+                game = st.session_state.game
+                get_leaderboard().record(game.puzzle_id, game.difficulty, game.get_elapsed_time(),
+                                         game.hints_used, game.errors)
                 st.balloons()
                 st.success("🎉 Puzzle solved!")
             else:
@@ -381,74 +234,41 @@ with st.sidebar:
         game = st.session_state.game
         st.write(f"**Time:** {game.format_time(game.get_elapsed_time())}")
         st.write(f"**Hints:** {game.hints_used}")
-        filled = 81 - np.count_nonzero(game.user_board == 0)
+        filled = game.filled
         st.write(f"**Progress:** {filled}/81")
         st.write(f"**Difficulty:** {game.difficulty.title()}")
+        st.write(f"**Rating:** {game.rating} ({game.hardest_technique})")
+    
+    leaderboard_expander()
+    puzzle_pool_expander()
 
-# Main game area
-col1, col2, col3 = st.columns([1, 2, 1])
+# Number buttons. This callback and the fragment below let a cell click
+# or a number button rerun only the board section.
+def enter_number(num):
+    """Number/clear button callback (0 clears); runs before the rerun"""
+    if st.session_state.selected_cell:
+        game = st.session_state.game
+        i, j = st.session_state.selected_cell
+        game.set_cell(i, j, num)  # Given cells are left unchanged
 
-with col2:
-    # Timer
-    if not st.session_state.game_over:
-        elapsed = st.session_state.game.get_elapsed_time()
-        st.markdown(f'<div class="timer">⏱️ {st.session_state.game.format_time(elapsed)}</div>', unsafe_allow_html=True)
-    
-    # Sudoku grid
+@st.fragment
+def board_panel():
+    """Grid, number pad, selection info, game status and progress"""
+    apply_board_event()
     game = st.session_state.game
     board = game.user_board
     original = game.board
     
     st.markdown('<div class="sudoku-container">', unsafe_allow_html=True)
     
-    # Display the grid
-    for i in range(9):
-        cols = st.columns(9)
-        for j in range(9):
-            with cols[j]:
-                # Determine cell value
-                cell_value = original[i][j] if original[i][j] != 0 else board[i][j]
-                display_text = str(cell_value) if cell_value != 0 else ""
-                
-                # Determine cell styling
-                cell_class = "sudoku-cell"
-                
-                # Thick borders for 3x3 boxes
-                if j % 3 == 2 and j < 8:
-                    cell_class += " thick-right"
-                if i % 3 == 2 and i < 8:
-                    cell_class += " thick-bottom"
-                
-                # Check cell type
-                if original[i][j] != 0:
-                    # Given cell - gray background, dark text
-                    cell_class += " given-cell"
-                    # Display as markdown with styling
-                    st.markdown(f'<div class="{cell_class}">{display_text}</div>', unsafe_allow_html=True)
-                else:
-                    # User cell - make it clickable
-                    
-                    # Check if selected
-                    if st.session_state.selected_cell == (i, j):
-                        cell_class += " selected-cell"
-                    
-                    # Check for errors
-                    if st.session_state.show_errors:
-                        errors = game.check_errors()
-                        if (i, j) in errors:
-                            cell_class += " error-cell"
-                    
-                    # Check for hint
-                    if st.session_state.show_hint and st.session_state.hint_cell == (i, j):
-                        cell_class += " hint-cell"
-                    
-                    # Add user cell class (blue numbers)
-                    cell_class += " user-cell"
-                    
-                    # Create a clickable button for the cell
-                    if st.button(display_text, key=f"cell_{i}_{j}", use_container_width=True):
-                        st.session_state.selected_cell = (i, j)
-                        st.rerun()
+    # The whole grid is one component; clicks and keys come back as one event
+    sudoku_board(
+        board,
+        original,
+        selected=st.session_state.selected_cell,
+        errors=game.check_errors() if st.session_state.show_errors else (),
+        hint=st.session_state.hint_cell if st.session_state.show_hint else None,
+    )
     
     st.markdown('</div>', unsafe_allow_html=True)
     
@@ -457,20 +277,17 @@ with col2:
     
     # Create number buttons 1-9
     for num in range(1, 10):
-        if st.button(str(num), key=f"num_{num}", use_container_width=True):
-            if st.session_state.selected_cell:
-                i, j = st.session_state.selected_cell
-                if original[i][j] == 0:  # Only update if not a given cell
-                    game.user_board[i][j] = num
-                    st.rerun()
+        st.button(str(num), key=f"num_{num}", on_click=enter_number, args=(num,), use_container_width=True)
     
     # Clear button with custom styling
-    if st.button("✕", key="clear", type="secondary", use_container_width=True):
-        if st.session_state.selected_cell:
-            i, j = st.session_state.selected_cell
-            if original[i][j] == 0:
-                game.user_board[i][j] = 0
-                st.rerun()
+    st.button("✕", key="clear", type="secondary", on_click=enter_number, args=(0,), use_container_width=True)
+    
+    # Undo / redo
+    undo_col, redo_col = st.columns(2)
+    with undo_col:
+        st.button("↶ Undo", key="undo", on_click=undo_move, disabled=not game.can_undo(), use_container_width=True)
+    with redo_col:
+        st.button("↷ Redo", key="redo", on_click=redo_move, disabled=not game.can_redo(), use_container_width=True)
     
     st.markdown('</div>', unsafe_allow_html=True)
     
@@ -499,50 +316,69 @@ with col2:
         st.success(f"🎉 **Solved!** Time: {game.format_time(game.get_elapsed_time())}")
     #elif game.is_complete():
         st.warning("All cells filled! Click 'Check Solution' to verify.")
-
-# Bottom section
-st.divider()
-
-col4, col5, col6 = st.columns(3)
-
-with col4:
+    
     # Progress
-    filled = 81 - np.count_nonzero(game.user_board == 0)
+    filled = game.filled
     progress = filled / 81
     st.subheader("Progress")
     st.progress(progress)
     st.caption(f"{filled}/81 cells ({progress*100:.0f}%)")
+    
+    save_game()
+
+# Same look as the .timer class above; the live timer runs in its own iframe
+TIMER_STYLE = ("font-size: 1.5rem; font-weight: bold; color: #1E3A8A; text-align: center; "
+               "padding: 10px; background-color: #F0F9FF; border-radius: 8px;")
+
+# Main game area
+game = st.session_state.game
+original = game.board
+
+col1, col2, col3 = st.columns([1, 2, 1])
+
+with col2:
+    # Timer (ticks in the browser, no server reruns)
+    if not st.session_state.game_over:
+        live_timer(st.session_state.game.get_elapsed_time(), height=70, style=TIMER_STYLE)
+    
+    board_panel()
+
+# Bottom section
+st.divider()
+
+col5, col6 = st.columns(2)
 
 with col5:
     # Quick actions
     st.subheader("Quick Actions")
     
     if st.button("Clear All My Numbers", use_container_width=True):
-        for i in range(9):
-            for j in range(9):
-                if original[i][j] == 0:
-                    game.user_board[i][j] = 0
+        game.clear_all()
         st.session_state.show_errors = False
         st.session_state.selected_cell = None
-        st.success("Cleared all your numbers!")
+        st.success("Cleared all your numbers! Undo brings them back.")
         st.rerun()
     
     if st.button("Show Next Number", use_container_width=True):
         if not st.session_state.game_over:
-            # Find first empty cell and fill with solution
-            for i in range(9):
-                for j in range(9):
-                    if game.user_board[i][j] == 0:
-                        game.user_board[i][j] = game.solution[i][j]
-                        st.session_state.selected_cell = (i, j)
-                        st.success(f"Revealed number at Row {i+1}, Column {j+1}")
-                        st.rerun()
-                        break
-                else:
-                    continue
-                break
+            # Fill the first empty cell; counts as a hint like Get Hint
+            cell = game.get_hint(first=True)
+            if cell:
+                st.session_state.selected_cell = cell
+                st.success(f"Revealed number at Row {cell[0]+1}, Column {cell[1]+1}")
+                st.rerun()
             else:
                 st.warning("No empty cells left!")
+    
+    # Built only when the button is clicked
+    build_pdf = lambda: export(game, 'pdf', include_solution=False)
+    st.download_button(
+        label="📄 Download as PDF",
+        data=build_pdf,
+        file_name=f"sudoku_{game.puzzle_id}.pdf",
+        mime="application/pdf",
+        use_container_width=True
+    )
 
 with col6:
     # Tips
@@ -575,10 +411,13 @@ with st.expander("📖 How to Play", expanded=True):
     - Each row: Numbers 1-9 (no repeats)
     - Each column: Numbers 1-9 (no repeats)
     - Each 3×3 box: Numbers 1-9 (no repeats)
-    -To save the game as pdf :rt click and click print in the pop-up menu
+    - To save the puzzle as a PDF, use **Download as PDF** under Quick Actions
     -**Enjoy the game!** 🎯
     """)
 st.write("developed by Subramanian Ramajayam")
+# Queue this session's game for the session store (written in the background)
+save_game()
+
 # Footer
 st.divider()
 st.caption("🔢 Sudoku Game • All numbers now have same font size • Blue = your numbers, Gray = given numbers")
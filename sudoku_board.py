@@ -0,0 +1,82 @@
+"""Client-side Streamlit components for the board and the timer.
+
+The grid is sent to the browser as one small payload (81-character value
+and given strings plus a few indices) and drawn client-side, instead of
+81 st.button/st.markdown widgets. A click or key press comes back as a
+single event dict:
+
+    {'row': r, 'col': c, 'digit': d, 'seq': '...'}
+
+where digit is None for a plain selection, 0 to clear the cell, or 1-9.
+
+Animations (the blinking selected cell) and the running timer are done
+in the browser, so an idle session causes no server reruns.
+"""
+
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+_FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "board_frontend")
+_board_component = components.declare_component("sudoku_board", path=_FRONTEND_DIR)
+
+BOARD_KEY = "sudoku_board"
+
+
+def sudoku_board(board, givens, selected=None, errors=(), hint=None,
+                 cell_size=50, font_size=28, blink=False, key=BOARD_KEY):
+    """Draw the grid; returns the last event sent by the component (or None)"""
+    values = "".join(str(int(value)) for row in board for value in row)
+    given_mask = "".join("1" if value else "0" for row in givens for value in row)
+    return _board_component(
+        values=values,
+        givens=given_mask,
+        selected=selected[0] * 9 + selected[1] if selected else None,
+        errors=[i * 9 + j for i, j in errors],
+        hint=hint[0] * 9 + hint[1] if hint else None,
+        cellSize=cell_size,
+        fontSize=font_size,
+        blink=blink,
+        key=key,
+        default=None,
+    )
+
+
+def new_board_event(key=BOARD_KEY):
+    """The board event that triggered this rerun, or None if already handled.
+
+    Widget values are in session state before the component is drawn, so
+    apps can apply the event first and render the updated board in the
+    same run.
+    """
+    event = st.session_state.get(key)
+    if not event or st.session_state.get(key + "_seen") == event.get("seq"):
+        return None
+    st.session_state[key + "_seen"] = event["seq"]
+    return event
+
+
+TIMER_STYLE = "font-size: 1rem;"
+
+
+def live_timer(elapsed, running=True, height=40, style=TIMER_STYLE):
+    """Timer that ticks in the browser from `elapsed` seconds, without reruns.
+
+    `style` is inline CSS for the timer text; page CSS does not reach the
+    timer's iframe.
+    """
+    st.iframe(f"""
+        <div id="timer" style="font-family: 'Source Sans Pro', sans-serif; {style}"></div>
+        <script>
+            const start = Date.now() - {int(elapsed)} * 1000;
+            function tick() {{
+                const seconds = Math.floor((Date.now() - start) / 1000);
+                const mm = String(Math.floor(seconds / 60)).padStart(2, "0");
+                const ss = String(seconds % 60).padStart(2, "0");
+                document.getElementById("timer").textContent = "⏱️ " + mm + ":" + ss;
+            }}
+            tick();
+            {"setInterval(tick, 1000);" if running else ""}
+        </script>
+    """, height=height)
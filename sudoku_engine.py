@@ -0,0 +1,568 @@
+"""Headless Sudoku engine: puzzle generation, solving, grading, game state
+and export, with no Streamlit dependency.
+
+Importing this module has no side effects, so worker processes, benchmarks
+and command-line tools can use it directly. The public API:
+
+    generate(difficulty, seed=None, backend)   -> (puzzle, solution, puzzle_id)
+    solve(board, backend)                      -> solution or None
+    count_solutions(board, limit, backend)     -> number of solutions (up to limit)
+    grade(board)                               -> (rating, hardest technique)
+    export(game, fmt, include_solution)        -> str (text formats) or bytes (docx, pdf)
+    SudokuGame                                 -> one game in progress
+
+Boards are 9x9 NumPy arrays or nested lists with 0 for blanks.
+"""
+
+import importlib.util
+import io
+import random
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+from board_render import render_html, render_svg, render_text
+from pdf_writer import A4, PdfWriter, grid_ops, text_ops
+from sudoku_grader import grade
+from sudoku_solver import (
+    DEFAULT_BACKEND, DIFFICULTY_LEVELS, SEED_LIMIT, SOLVER_BACKENDS,
+    board_to_line, count_solutions, generate_seeded_puzzle, make_puzzle_id,
+    puzzle_from_id, random_solution, solve, transformed_solution,
+)
+
+__all__ = [
+    'DIFFICULTY_LEVELS', 'DOCX_AVAILABLE', 'EXPORT_FORMATS', 'SOLVER_BACKENDS',
+    'SudokuGame', 'count_solutions', 'export', 'game_from_id', 'generate',
+    'grade', 'solve',
+]
+
+# Word export needs python-docx; checking for it does not import it
+DOCX_AVAILABLE = importlib.util.find_spec("docx") is not None
+
+# PDF export is built in (pdf_writer); page margin in points
+PDF_MARGIN = 60
+PDF_INSTRUCTIONS = (
+    "1. Fill each row with numbers 1-9 (no repeats)",
+    "2. Fill each column with numbers 1-9 (no repeats)",
+    "3. Fill each 3x3 box with numbers 1-9 (no repeats)",
+    "4. Use pencil marks for possible numbers",
+)
+# Width of the SVG grids in HTML exports, in pixels
+HTML_GRID_SIZE = 450
+
+# Set on the cell byte of a logged move that belongs with the move before it
+MOVE_JOINED = 0x80
+
+class SudokuGame:
+    # One instance lives in every session, so keep it small: no __dict__,
+    # uint8 boards, givens as an 81-bit mask, byte counters
+    __slots__ = ('difficulty', 'solver_backend', 'solution', 'user_board', 'givens',
+                 'start_time', 'end_time', 'hints_used', 'errors', 'rating',
+                 'hardest_technique', 'row_counts', 'col_counts', 'box_counts',
+                 'filled', 'duplicates', 'move_log', 'move_times', 'move_count', 'puzzle_id')
+    
+    def __init__(self, difficulty='medium', solver_backend=DEFAULT_BACKEND, puzzle=None):
+        self.difficulty = difficulty
+        self.solver_backend = solver_backend
+        self.solution = None
+        self.user_board = None
+        self.givens = 0
+        self.start_time = None
+        self.end_time = None
+        self.hints_used = 0
+        self.errors = 0
+        self.puzzle_id = None
+        self.rating = None
+        self.hardest_technique = None
+        if puzzle is not None:
+            self.load_puzzle(*puzzle)
+        else:
+            self.generate_new_puzzle()
+    
+    def generate_new_puzzle(self, seed=None):
+        # Every puzzle comes from a seed so its ID can regenerate it
+        if seed is None:
+            seed = random.randrange(SEED_LIMIT)
+        
+        puzzle_id = make_puzzle_id(self.difficulty, seed)
+        # Generate puzzles until the grader's rating matches the difficulty
+        board, solution = generate_seeded_puzzle(self.difficulty, seed, self.solver_backend)
+        self.load_puzzle(board, solution, puzzle_id)
+    
+    def load_puzzle(self, board, solution, puzzle_id=None):
+        """Start a game on a ready-made puzzle, e.g. one taken from the puzzle pool"""
+        self.solution = np.array(solution, dtype=np.uint8)
+        self.user_board = np.array(board, dtype=np.uint8)
+        self.givens = int.from_bytes(np.packbits(self.user_board.ravel() != 0, bitorder='little').tobytes(), 'little')
+        self._reset_counters()
+        self._reset_log()
+        self.rating, self.hardest_technique = grade(self.user_board)
+        
+        self.start_time = time.time()
+        self.end_time = None
+        self.hints_used = 0
+        self.errors = 0
+        if puzzle_id:
+            self.puzzle_id = puzzle_id
+        else:
+            self.generate_puzzle_id()
+    
+    def generate_puzzle_id(self):
+        """ID for puzzles not generated from a seed: the 81-character puzzle itself"""
+        self.puzzle_id = board_to_line(self.board)
+    
+    @property
+    def board(self):
+        """The puzzle's given numbers as a 9x9 array (0 for blanks), rebuilt from the givens mask"""
+        if self.user_board is None:
+            return None
+        mask = np.unpackbits(np.frombuffer(self.givens.to_bytes(11, 'little'), dtype=np.uint8), bitorder='little')
+        return self.user_board * mask[:81].reshape(9, 9)
+    
+    def is_given(self, row, col):
+        return (self.givens >> (row * 9 + col)) & 1 == 1
+    
+    def generate_solution(self, rng=random, fast=True):
+        if fast:
+            # Reshuffle an embedded seed grid with validity-preserving transforms
+            return np.array(transformed_solution(rng), dtype=np.uint8)
+        # Random digit order on an empty grid gives a random complete solution
+        return np.array(random_solution(rng, backend=self.solver_backend), dtype=np.uint8)
+    
+    def has_unique_solution(self):
+        return count_solutions(self.board, limit=2, backend=self.solver_backend) == 1
+    
+    def get_hint(self, first=False):
+        """Fill a random empty cell (the first one with `first`) from the solution.
+
+        Every revealed cell counts as a hint. Returns the cell, or None when
+        the board is full.
+        """
+        empty_cells = []
+        for i in range(9):
+            for j in range(9):
+                if self.user_board[i][j] == 0:
+                    empty_cells.append((i, j))
+        
+        if empty_cells:
+            row, col = empty_cells[0] if first else random.choice(empty_cells)
+            self.set_cell(row, col, self.solution[row][col])
+            self.hints_used += 1
+            return row, col
+        return None
+    
+    def check_solution(self):
+        if self.filled < 81 or self.duplicates:
+            return False
+        for i in range(9):
+            for j in range(9):
+                if self.user_board[i][j] != self.solution[i][j]:
+                    return False
+        self.end_time = time.time()
+        return True
+    
+    def _reset_counters(self):
+        """Rebuild the digit counters from user_board; done once per puzzle"""
+        # counts[unit * 10 + digit] is how often digit appears in that row/column/box
+        self.row_counts = bytearray(90)
+        self.col_counts = bytearray(90)
+        self.box_counts = bytearray(90)
+        self.filled = 0
+        self.duplicates = 0  # (unit, digit) pairs that occur more than once
+        for i in range(9):
+            for j in range(9):
+                if self.user_board[i][j]:
+                    self._count(i, j, int(self.user_board[i][j]), 1)
+    
+    def _count(self, row, col, digit, step):
+        """Add step (+1 or -1) to the counters of digit at (row, col)"""
+        self.filled += step
+        box = (row // 3) * 3 + col // 3
+        for counts, k in ((self.row_counts, row * 10 + digit), (self.col_counts, col * 10 + digit),
+                          (self.box_counts, box * 10 + digit)):
+            before = counts[k]
+            counts[k] = before + step
+            self.duplicates += (before + step > 1) - (before > 1)
+    
+    def set_cell(self, row, col, digit, joined=False):
+        """Enter digit (0 clears) in a non-given cell and log the move; False for given cells.
+        
+        joined=True makes the move part of the previous one, so a single undo
+        reverts both.
+        """
+        if self.is_given(row, col):
+            return False
+        old = int(self.user_board[row][col])
+        digit = int(digit)
+        if old != digit:
+            self._write(row, col, old, digit)
+            if digit and self.is_conflict(row, col):
+                self.errors += 1  # Mistakes count toward the leaderboard
+            # A new move drops whatever could still have been redone
+            del self.move_log[3 * self.move_count:]
+            del self.move_times[self.move_count:]
+            self.move_log.extend(((row * 9 + col) | (MOVE_JOINED if joined else 0), old, digit))
+            self.move_times.append(time.time() - self.start_time)
+            self.move_count += 1
+        return True
+    
+    def _write(self, row, col, old, digit):
+        """Replace old with digit at (row, col), keeping the counters in step"""
+        if old:
+            self._count(row, col, old, -1)
+        if digit:
+            self._count(row, col, digit, 1)
+        self.user_board[row][col] = digit
+    
+    def _reset_log(self):
+        # Move log: 3 bytes per move (cell, old digit, new digit) and the time
+        # of the move in seconds since the start. move_count moves are applied;
+        # the rest of the log can be redone.
+        self.move_log = array('B')
+        self.move_times = array('f')
+        self.move_count = 0
+    
+    def can_undo(self):
+        return self.move_count > 0
+    
+    def can_redo(self):
+        return 3 * self.move_count < len(self.move_log)
+    
+    def undo(self):
+        """Revert the last move (or joined group of moves); returns its (row, col) or None"""
+        cell = None
+        while self.move_count:
+            self.move_count -= 1
+            k = 3 * self.move_count
+            flagged, old, new = self.move_log[k:k + 3]
+            cell = divmod(flagged & ~MOVE_JOINED, 9)
+            self._write(*cell, new, old)
+            if not flagged & MOVE_JOINED:
+                break
+        return cell
+    
+    def redo(self):
+        """Re-apply the next undone move (or joined group); returns its (row, col) or None"""
+        cell = None
+        while self.can_redo():
+            k = 3 * self.move_count
+            flagged, old, new = self.move_log[k:k + 3]
+            if cell is not None and not flagged & MOVE_JOINED:
+                break
+            cell = divmod(flagged & ~MOVE_JOINED, 9)
+            self._write(*cell, old, new)
+            self.move_count += 1
+        return cell
+    
+    def board_at(self, moves):
+        """The user board as it was after the first `moves` logged moves"""
+        board = self.board
+        for k in range(0, 3 * moves, 3):
+            board.flat[self.move_log[k] & ~MOVE_JOINED] = self.move_log[k + 2]
+        return board
+    
+    def restore_moves(self, move_log, move_times, move_count):
+        """Take over a saved move log and replay its first move_count moves"""
+        self.move_log = move_log
+        self.move_times = move_times
+        self.move_count = move_count
+        self.user_board = self.board_at(move_count)
+        self._reset_counters()
+    
+    def clear_all(self):
+        """Clear every entered number as one undoable move"""
+        joined = False
+        for i in range(9):
+            for j in range(9):
+                if self.user_board[i][j] and not self.is_given(i, j):
+                    self.set_cell(i, j, 0, joined)
+                    joined = True
+    
+    def is_conflict(self, row, col):
+        """True if the digit at (row, col) repeats in its row, column or box"""
+        digit = int(self.user_board[row][col])
+        return digit != 0 and (self.row_counts[row * 10 + digit] > 1 or
+                               self.col_counts[col * 10 + digit] > 1 or
+                               self.box_counts[((row // 3) * 3 + col // 3) * 10 + digit] > 1)
+    
+    def has_conflicts(self):
+        return self.duplicates > 0
+    
+    def check_errors(self):
+        if not self.duplicates:
+            return []
+        return [(i, j) for i in range(9) for j in range(9) if self.is_conflict(i, j)]
+    
+    def get_elapsed_time(self):
+        if self.start_time is None:
+            return 0
+        if self.end_time is not None:
+            return int(self.end_time - self.start_time)
+        return int(time.time() - self.start_time)
+    
+    def format_time(self, seconds):
+        minutes = seconds // 60
+        seconds = seconds % 60
+        return f"{minutes:02d}:{seconds:02d}"
+    
+    def is_complete(self):
+        """Check if all cells are filled (not necessarily correctly)"""
+        return self.filled == 81
+    
+    def export_to_word(self, include_solution=False):
+        """Export puzzle to Word document"""
+        if not DOCX_AVAILABLE:
+            raise ValueError("Word export needs python-docx: pip install python-docx "
+                             "(PDF export needs nothing extra)")
+        
+        # Imported here: python-docx is slow to import and only needed for this
+        from docx import Document
+        from docx.shared import Pt
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+        
+        board = self.board
+        doc = Document()
+        
+        # Title
+        title = doc.add_heading('Sudoku Puzzle', 0)
+        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        
+        # Difficulty and info
+        doc.add_paragraph(f'Difficulty: {self.difficulty.title()}')
+        doc.add_paragraph(f'Puzzle ID: {self.puzzle_id}')
+        doc.add_paragraph(f'Date: {time.strftime("%Y-%m-%d %H:%M")}')
+        doc.add_paragraph()
+        
+        # Create puzzle grid
+        doc.add_heading('Puzzle Grid', level=1)
+        
+        # Create table for puzzle
+        table = doc.add_table(rows=9, cols=9)
+        table.style = 'Table Grid'
+        
+        # Fill table with puzzle numbers
+        for i in range(9):
+            row_cells = table.rows[i].cells
+            for j in range(9):
+                cell = row_cells[j]
+                cell.text = str(board[i][j]) if board[i][j] != 0 else ""
+                paragraph = cell.paragraphs[0]
+                paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                
+                # Style for given numbers (bold)
+                if board[i][j] != 0:
+                    for run in paragraph.runs:
+                        run.font.bold = True
+                        run.font.size = Pt(14)
+                else:
+                    for run in paragraph.runs:
+                        run.font.size = Pt(12)
+        
+        doc.add_paragraph()
+        
+        # Add solution if requested
+        if include_solution:
+            doc.add_heading('Solution', level=1)
+            
+            # Create table for solution
+            sol_table = doc.add_table(rows=9, cols=9)
+            sol_table.style = 'Table Grid'
+            
+            for i in range(9):
+                row_cells = sol_table.rows[i].cells
+                for j in range(9):
+                    cell = row_cells[j]
+                    cell.text = str(self.solution[i][j])
+                    paragraph = cell.paragraphs[0]
+                    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                    for run in paragraph.runs:
+                        run.font.size = Pt(14)
+        
+        # Add instructions
+        doc.add_page_break()
+        doc.add_heading('How to Solve Sudoku', level=1)
+        doc.add_paragraph('''Sudoku Rules:
+1. Each row must contain the numbers 1-9 exactly once
+2. Each column must contain the numbers 1-9 exactly once
+3. Each 3x3 box must contain the numbers 1-9 exactly once
+
+Tips:
+• Start with rows/columns that have the most numbers
+• Look for numbers that can only go in one cell
+• Use pencil marks for possible numbers
+• Take your time and be patient!''')
+        
+        # Save to bytes
+        doc_bytes = io.BytesIO()
+        doc.save(doc_bytes)
+        doc_bytes.seek(0)
+        
+        return doc_bytes
+    
+    def export_to_pdf(self, include_solution=False):
+        """Export puzzle as a PDF (bytes); the solution goes on a second page"""
+        width, height = A4
+        size = width - 2 * PDF_MARGIN
+        puzzle = board_to_line(self.board)
+        pdf_bytes = io.BytesIO()
+        with PdfWriter(pdf_bytes) as pdf:
+            info = [
+                text_ops(PDF_MARGIN, height - 70, "Sudoku Puzzle", 24, bold=True),
+                text_ops(PDF_MARGIN, height - 100, f"Difficulty: {self.difficulty.title()}", 12),
+                text_ops(PDF_MARGIN, height - 118, f"Puzzle ID: {self.puzzle_id}", 12),
+                text_ops(PDF_MARGIN, height - 136, f"Date: {time.strftime('%Y-%m-%d %H:%M')}", 12),
+                grid_ops(PDF_MARGIN, height - 170 - size, size, puzzle),
+            ]
+            y = height - 200 - size
+            for line in PDF_INSTRUCTIONS:
+                info.append(text_ops(PDF_MARGIN, y, line, 11))
+                y -= 16
+            pdf.add_page("".join(info))
+            if include_solution:
+                # Givens stay bold so the filled-in digits stand out
+                pdf.add_page(
+                    text_ops(PDF_MARGIN, height - 70, "Solution", 24, bold=True)
+                    + text_ops(PDF_MARGIN, height - 100, f"Puzzle ID: {self.puzzle_id}", 12)
+                    + grid_ops(PDF_MARGIN, height - 170 - size, size,
+                               board_to_line(self.solution), givens=puzzle)
+                )
+        return pdf_bytes.getvalue()
+    
+    def export_to_text_file(self, include_solution=False):
+        """Export puzzle as text file with better formatting"""
+        rule = "=" * 40 + "\n"
+        parts = [
+            "SUDOKU PUZZLE\n", rule,
+            f"Difficulty: {self.difficulty.title()}\n",
+            f"Puzzle ID: {self.puzzle_id}\n",
+            f"Date: {time.strftime('%Y-%m-%d %H:%M')}\n",
+            rule, "\n",
+            "PUZZLE GRID:\n", render_text(board_to_line(self.board), 'box'), "\n",
+        ]
+        if include_solution:
+            parts += ["SOLUTION:\n", render_text(board_to_line(self.solution), 'box'), "\n"]
+        
+        # Add instructions
+        parts += [
+            "INSTRUCTIONS:\n", "-" * 40 + "\n",
+            "1. Fill each row with numbers 1-9 (no repeats)\n",
+            "2. Fill each column with numbers 1-9 (no repeats)\n",
+            "3. Fill each 3x3 box with numbers 1-9 (no repeats)\n",
+            "4. Use pencil marks for possible numbers\n",
+            "5. Start with rows/columns with most given numbers\n\n",
+            "Share this puzzle with friends using Puzzle ID: " + self.puzzle_id,
+        ]
+        return "".join(parts)
+    
+    def export_to_simple_text(self):
+        """Simple text export without fancy formatting"""
+        return "".join((
+            f"Sudoku Puzzle - {self.difficulty.title()}\n",
+            f"Puzzle ID: {self.puzzle_id}\n",
+            f"Date: {time.strftime('%Y-%m-%d %H:%M')}\n",
+            "=" * 40 + "\n\n",
+            render_text(board_to_line(self.board), 'plain'),
+            "\nInstructions:\n",
+            "1. Fill each row with numbers 1-9 (no repeats)\n",
+            "2. Fill each column with numbers 1-9 (no repeats)\n",
+            "3. Fill each 3x3 box with numbers 1-9 (no repeats)\n",
+        ))
+    
+    def export_to_html(self, include_solution=False):
+        """Export puzzle as a printable HTML page with SVG grids"""
+        puzzle = board_to_line(self.board)
+        grids = [("Puzzle", render_svg(puzzle, size=HTML_GRID_SIZE))]
+        if include_solution:
+            grids.append(("Solution", render_svg(board_to_line(self.solution), puzzle, HTML_GRID_SIZE)))
+        return render_html("Sudoku Puzzle", grids, (
+            f"Difficulty: {self.difficulty.title()}",
+            f"Puzzle ID: {self.puzzle_id}",
+            f"Date: {time.strftime('%Y-%m-%d %H:%M')}",
+        ))
+    
+    def get_shareable_data(self):
+        """Get data for sharing"""
+        return {
+            'puzzle_id': self.puzzle_id,
+            'difficulty': self.difficulty,
+            'board': self.board.tolist(),
+            'solution': self.solution.tolist(),
+            'timestamp': time.time(),
+            'share_text': f"""🎮 Sudoku Challenge!
+
+Difficulty: {self.difficulty.title()}
+Puzzle ID: {self.puzzle_id}
+Date: {time.strftime('%Y-%m-%d')}
+
+Load it with "Load puzzle by ID" and share your time!"""
+        }
+
+
+def generate(difficulty='medium', seed=None, backend=DEFAULT_BACKEND):
+    """Generate a puzzle; returns (puzzle, solution, puzzle_id) with 9x9 lists.
+
+    The same seed and difficulty always give the same puzzle, whichever
+    backend checks it, and the returned ID regenerates it (see game_from_id).
+    """
+    if seed is None:
+        seed = random.randrange(SEED_LIMIT)
+    puzzle_id = make_puzzle_id(difficulty, seed)
+    puzzle, solution = generate_seeded_puzzle(difficulty, seed, backend)
+    return puzzle, solution, puzzle_id
+
+
+def game_from_id(puzzle_id, difficulty='medium', backend=DEFAULT_BACKEND):
+    """Start a SudokuGame from a puzzle ID or an 81-character puzzle line.
+
+    `difficulty` labels puzzle lines, which do not carry one; `backend` is
+    the solver the game uses. Raises ValueError for an ID that cannot be
+    decoded.
+    """
+    puzzle, solution, level = puzzle_from_id(puzzle_id)
+    puzzle_id = puzzle_id.strip()
+    if len(puzzle_id) != 81:
+        puzzle_id = puzzle_id.upper()
+    return SudokuGame(level or difficulty, backend, puzzle=(puzzle, solution, puzzle_id))
+
+
+EXPORT_FORMATS = {
+    'text': lambda game, include_solution: game.export_to_text_file(include_solution),
+    'simple': lambda game, include_solution: game.export_to_simple_text(),
+    'docx': lambda game, include_solution: game.export_to_word(include_solution).getvalue(),
+    'pdf': lambda game, include_solution: game.export_to_pdf(include_solution),
+    'html': lambda game, include_solution: game.export_to_html(include_solution),
+}
+
+
+# Exports depend only on the puzzle and its difficulty label, so they are
+# cached per puzzle ID and difficulty
+EXPORT_CACHE_SIZE = 64
+_export_cache = OrderedDict()
+_export_lock = threading.Lock()
+
+
+def export(game, fmt='text', include_solution=False):
+    """Render a game's puzzle as 'text', 'simple', 'html', 'docx' or 'pdf' (bytes).
+
+    Results are kept in a small LRU cache keyed by (puzzle_id, difficulty,
+    format, include_solution), so the date printed in a cached export is
+    the time it was first built. The difficulty is in the key because a
+    puzzle without a seed ID is keyed by its 81-character line, and the
+    same line can be played under different difficulty labels.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; choose from {', '.join(EXPORT_FORMATS)}")
+    key = (game.puzzle_id, game.difficulty, fmt, bool(include_solution) and fmt != 'simple')
+    with _export_lock:
+        if key in _export_cache:
+            _export_cache.move_to_end(key)
+            return _export_cache[key]
+    data = EXPORT_FORMATS[fmt](game, include_solution)
+    with _export_lock:
+        _export_cache[key] = data
+        if len(_export_cache) > EXPORT_CACHE_SIZE:
+            _export_cache.popitem(last=False)
+    return data
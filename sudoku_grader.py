@@ -0,0 +1,236 @@
+"""Human-style difficulty grader.
+
+The grader solves a puzzle the way a person would, always using the
+easiest technique that still makes progress, and rates the puzzle by the
+hardest technique it needed. Puzzles that none of the techniques can
+finish are rated as needing trial and error.
+
+Ratings are cached by board, so grading the same puzzle twice is free.
+"""
+
+from functools import lru_cache
+
+ALL_DIGITS = 0x1FF
+
+ROWS = [[r * 9 + c for c in range(9)] for r in range(9)]
+COLS = [[r * 9 + c for r in range(9)] for c in range(9)]
+BOXES = [[(b // 3 * 3 + k // 3) * 9 + b % 3 * 3 + k % 3 for k in range(9)] for b in range(9)]
+UNITS = ROWS + COLS + BOXES
+PEERS = [sorted({p for unit in UNITS if i in unit for p in unit} - {i}) for i in range(81)]
+
+BIT_DIGIT = {1 << (d - 1): d for d in range(1, 10)}
+POPCOUNT = [bin(mask).count("1") for mask in range(512)]
+BITS_OF = [[bit for bit in BIT_DIGIT if mask & bit] for mask in range(512)]
+
+# Technique weights, roughly following the common Sudoku Explainer scale
+TECHNIQUES = {
+    'hidden single (box)': 1.2,
+    'hidden single': 1.5,
+    'naked single': 2.3,
+    'pointing': 2.6,
+    'claiming': 2.8,
+    'naked pair': 3.0,
+    'x-wing': 3.2,
+    'hidden pair': 3.4,
+    'trial and error': 5.0,
+}
+
+# Rating range (inclusive) accepted for each level. The ranges do not
+# overlap, so every rating belongs to at most one level and each level
+# needs a harder technique than the one below it: easy puzzles fall to
+# hidden singles in boxes, medium ones need singles in rows and columns,
+# hard ones locked candidates, pairs or X-wings, and expert ones guessing.
+RATING_RANGES = {
+    'easy': (0.0, 1.2),
+    'medium': (1.5, 2.3),
+    'hard': (2.6, 3.4),
+    'expert': (5.0, 10.0),
+}
+
+
+class _Grid:
+    def __init__(self, cells):
+        self.values = list(cells)
+        self.cands = [0] * 81
+        for i in range(81):
+            if self.values[i] == 0:
+                used = 0
+                for p in PEERS[i]:
+                    if self.values[p]:
+                        used |= 1 << (self.values[p] - 1)
+                self.cands[i] = ALL_DIGITS & ~used
+
+    def place(self, i, bit):
+        self.values[i] = BIT_DIGIT[bit]
+        self.cands[i] = 0
+        cands = self.cands
+        for p in PEERS[i]:
+            cands[p] &= ~bit
+
+    def eliminate(self, cells, mask):
+        """Remove `mask` from the candidates of `cells`; True if anything changed"""
+        changed = False
+        cands = self.cands
+        for i in cells:
+            if cands[i] & mask:
+                cands[i] &= ~mask
+                changed = True
+        return changed
+
+    def solved(self):
+        return 0 not in self.values
+
+    def stuck(self):
+        """An empty cell with no candidates left means the givens are contradictory"""
+        return any(v == 0 and c == 0 for v, c in zip(self.values, self.cands))
+
+    # Techniques: each returns True when it placed a digit or removed a candidate
+
+    def hidden_single_box(self):
+        return self.hidden_single(BOXES)
+
+    def hidden_single(self, units=ROWS + COLS):
+        for unit in units:
+            once = twice = 0
+            for i in unit:
+                twice |= once & self.cands[i]
+                once |= self.cands[i]
+            singles = once & ~twice
+            if singles:
+                bit = BITS_OF[singles][0]
+                for i in unit:
+                    if self.cands[i] & bit:
+                        self.place(i, bit)
+                        return True
+        return False
+
+    def naked_single(self):
+        for i in range(81):
+            if POPCOUNT[self.cands[i]] == 1:
+                self.place(i, self.cands[i])
+                return True
+        return False
+
+    def pointing(self):
+        # Candidates of a digit inside a box all on one row/column clear that line
+        for box in BOXES:
+            for bit in BIT_DIGIT:
+                cells = [i for i in box if self.cands[i] & bit]
+                if len(cells) < 2:
+                    continue
+                rows = {i // 9 for i in cells}
+                cols = {i % 9 for i in cells}
+                for lines, keys in ((ROWS, rows), (COLS, cols)):
+                    if len(keys) == 1:
+                        line = lines[keys.pop()]
+                        if self.eliminate([i for i in line if i not in box], bit):
+                            return True
+        return False
+
+    def claiming(self):
+        # Candidates of a digit on a row/column all inside one box clear that box
+        for line in ROWS + COLS:
+            for bit in BIT_DIGIT:
+                cells = [i for i in line if self.cands[i] & bit]
+                if len(cells) < 2:
+                    continue
+                boxes = {(i // 27) * 3 + (i % 9) // 3 for i in cells}
+                if len(boxes) == 1:
+                    box = BOXES[boxes.pop()]
+                    if self.eliminate([i for i in box if i not in line], bit):
+                        return True
+        return False
+
+    def naked_pair(self):
+        for unit in UNITS:
+            seen = {}
+            for i in unit:
+                mask = self.cands[i]
+                if POPCOUNT[mask] != 2:
+                    continue
+                if mask in seen:
+                    pair = (seen[mask], i)
+                    if self.eliminate([c for c in unit if c not in pair], mask):
+                        return True
+                else:
+                    seen[mask] = i
+        return False
+
+    def hidden_pair(self):
+        for unit in UNITS:
+            places = {}
+            for bit in BIT_DIGIT:
+                cells = tuple(i for i in unit if self.cands[i] & bit)
+                if len(cells) == 2:
+                    places.setdefault(cells, []).append(bit)
+            for cells, bits in places.items():
+                if len(bits) == 2:
+                    keep = bits[0] | bits[1]
+                    if self.eliminate(cells, ALL_DIGITS & ~keep):
+                        return True
+        return False
+
+    def x_wing(self):
+        for bit in BIT_DIGIT:
+            for lines, crosses in ((ROWS, COLS), (COLS, ROWS)):
+                pairs = {}
+                for n, line in enumerate(lines):
+                    spots = tuple(k for k, i in enumerate(line) if self.cands[i] & bit)
+                    if len(spots) == 2:
+                        pairs.setdefault(spots, []).append(n)
+                for spots, found in pairs.items():
+                    if len(found) == 2:
+                        cells = [i for k in spots for i in crosses[k]
+                                 if i not in lines[found[0]] and i not in lines[found[1]]]
+                        if self.eliminate(cells, bit):
+                            return True
+        return False
+
+
+@lru_cache(maxsize=4096)
+def _grade_line(line):
+    grid = _Grid(int(ch) for ch in line)
+    steps = [
+        ('hidden single (box)', grid.hidden_single_box),
+        ('hidden single', grid.hidden_single),
+        ('naked single', grid.naked_single),
+        ('pointing', grid.pointing),
+        ('claiming', grid.claiming),
+        ('naked pair', grid.naked_pair),
+        ('x-wing', grid.x_wing),
+        ('hidden pair', grid.hidden_pair),
+    ]
+    hardest = None
+    while not grid.solved():
+        if grid.stuck():
+            hardest = 'trial and error'
+            break
+        for name, technique in steps:
+            if technique():
+                if hardest is None or TECHNIQUES[name] > TECHNIQUES[hardest]:
+                    hardest = name
+                break
+        else:
+            hardest = 'trial and error'
+            break
+    return (TECHNIQUES[hardest] if hardest else 0.0), hardest
+
+
+def grade(board):
+    """Return (rating, hardest technique) for a 9x9 board.
+
+    The technique is None for a board that is already complete.
+    """
+    return _grade_line("".join(str(int(value)) for row in board for value in row))
+
+
+def rating_distance(rating, difficulty):
+    """How far `rating` is outside the range for `difficulty` (0 when inside)"""
+    low, high = RATING_RANGES.get(difficulty, (0.0, 10.0))
+    return max(low - rating, rating - high, 0.0)
+
+
+def rating_matches(rating, difficulty):
+    """True if `rating` falls in the range accepted for `difficulty`"""
+    low, high = RATING_RANGES.get(difficulty, (0.0, 10.0))
+    return low <= rating <= high
@@ -0,0 +1,644 @@
+"""Sudoku solving and puzzle generation shared by the apps and the CLIs.
+
+Two exact solvers: BitmaskSolver keeps a 9-bit mask of the digits placed
+in every row, column and box and branches on the most constrained cell;
+DancingLinksSolver runs Algorithm X on an exact-cover matrix. On top of
+them: solution grids from transformed seed grids, clue removal with an
+incremental uniqueness check, generate_puzzle (graded by sudoku_grader
+until the rating fits the level), seed-based puzzle IDs, and the
+count_work counters the benchmarks read.
+"""
+
+import random
+from contextlib import contextmanager
+from functools import lru_cache
+
+from sudoku_grader import grade, rating_distance
+
+ALL_DIGITS = 0x1FF
+
+# Static lookup tables (cell index 0..80 in row-major order)
+ROW_OF = [i // 9 for i in range(81)]
+COL_OF = [i % 9 for i in range(81)]
+BOX_OF = [(i // 27) * 3 + (i % 9) // 3 for i in range(81)]
+
+# Number of set bits and the digits they stand for, for every 9-bit mask
+POPCOUNT = [bin(mask).count("1") for mask in range(512)]
+DIGITS_OF = [[d for d in range(1, 10) if mask & (1 << (d - 1))] for mask in range(512)]
+
+# Active WorkCounters (see count_work); empty outside benchmarks
+_work_counters = []
+
+
+class WorkCounter:
+    """Solvers built and generation attempts graded inside count_work()"""
+
+    def __init__(self):
+        self.solvers = []
+        self.attempts = 0
+
+    @property
+    def nodes(self):
+        """Search nodes visited by every solver built so far"""
+        return sum(solver.nodes for solver in self.solvers)
+
+
+@contextmanager
+def count_work():
+    """Count the solver work done in a with block; yields a WorkCounter"""
+    counter = WorkCounter()
+    _work_counters.append(counter)
+    try:
+        yield counter
+    finally:
+        _work_counters.remove(counter)
+
+
+def flatten_board(board):
+    """Turn a 9x9 board (NumPy array or nested lists) into a list of 81 ints"""
+    return [int(value) for row in board for value in row]
+
+
+def to_rows(cells):
+    """Turn a list of 81 ints back into a 9x9 list of rows"""
+    return [list(cells[r * 9:(r + 1) * 9]) for r in range(9)]
+
+
+def board_to_line(board, empty="."):
+    """81-character one-line form of a board, `empty` marking blank cells"""
+    return "".join(str(value) if value else empty for value in flatten_board(board))
+
+
+def line_to_board(line):
+    """Parse an 81-character line ('.' or '0' for blanks) into 9x9 rows"""
+    line = line.strip()
+    if len(line) != 81:
+        raise ValueError(f"Expected 81 cells, got {len(line)}")
+    return to_rows([0 if ch in ".0" else int(ch) for ch in line])
+
+
+class BitmaskSolver:
+    def __init__(self, board):
+        self.cells = flatten_board(board)
+        self.rows = [0] * 9
+        self.cols = [0] * 9
+        self.boxes = [0] * 9
+        self.empties = []
+        self.nodes = 0
+        # False when the givens already break a row/column/box rule
+        self.valid = True
+        for counter in _work_counters:
+            counter.solvers.append(self)
+
+        for i, value in enumerate(self.cells):
+            if value == 0:
+                self.empties.append(i)
+                continue
+            bit = 1 << (value - 1)
+            r, c, b = ROW_OF[i], COL_OF[i], BOX_OF[i]
+            if (self.rows[r] | self.cols[c] | self.boxes[b]) & bit:
+                self.valid = False
+            self.rows[r] |= bit
+            self.cols[c] |= bit
+            self.boxes[b] |= bit
+
+    def candidates(self, i):
+        """Bitmask of digits that can still go in cell i"""
+        return ALL_DIGITS & ~(self.rows[ROW_OF[i]] | self.cols[COL_OF[i]] | self.boxes[BOX_OF[i]])
+
+    def place(self, i, digit):
+        bit = 1 << (digit - 1)
+        self.cells[i] = digit
+        self.rows[ROW_OF[i]] |= bit
+        self.cols[COL_OF[i]] |= bit
+        self.boxes[BOX_OF[i]] |= bit
+
+    def remove(self, i, digit):
+        bit = ~(1 << (digit - 1))
+        self.cells[i] = 0
+        self.rows[ROW_OF[i]] &= bit
+        self.cols[COL_OF[i]] &= bit
+        self.boxes[BOX_OF[i]] &= bit
+
+    def _pick_cell(self):
+        """Return (position in empties, candidate mask) of the most constrained cell"""
+        rows, cols, boxes = self.rows, self.cols, self.boxes
+        best_pos = -1
+        best_mask = 0
+        best_count = 10
+        for pos, i in enumerate(self.empties):
+            mask = ALL_DIGITS & ~(rows[ROW_OF[i]] | cols[COL_OF[i]] | boxes[BOX_OF[i]])
+            count = POPCOUNT[mask]
+            if count < best_count:
+                best_pos, best_mask, best_count = pos, mask, count
+                if count <= 1:
+                    break
+        return best_pos, best_mask
+
+    def _take(self, pos):
+        """Remove empties[pos] from the empty list in O(1) and return it"""
+        empties = self.empties
+        i = empties[pos]
+        empties[pos] = empties[-1]
+        empties.pop()
+        return i
+
+    def clear_cell(self, i):
+        """Empty filled cell i and return the digit it held"""
+        digit = self.cells[i]
+        self.remove(i, digit)
+        self.empties.append(i)
+        return digit
+
+    def restore_cell(self, i, digit):
+        """Undo clear_cell"""
+        self.empties.remove(i)
+        self.place(i, digit)
+
+    def has_alternative(self, i, digit):
+        """True if a solution exists with something other than `digit` in empty cell i.
+
+        When the board with `digit` in cell i is known to have exactly one
+        solution, this is the same as asking whether clearing the cell made
+        the puzzle ambiguous, but it only has to search the other branches.
+        """
+        self._take(self.empties.index(i))
+        found = False
+        for other in DIGITS_OF[self.candidates(i) & ~(1 << (digit - 1))]:
+            self.nodes += 1
+            self.place(i, other)
+            found = self._count(1) > 0
+            self.remove(i, other)
+            if found:
+                break
+        self.empties.append(i)
+        return found
+
+    def _count(self, limit):
+        if not self.empties:
+            return 1
+        pos, mask = self._pick_cell()
+        if mask == 0:
+            return 0
+
+        i = self._take(pos)
+        count = 0
+        for digit in DIGITS_OF[mask]:
+            self.nodes += 1
+            self.place(i, digit)
+            count += self._count(limit - count)
+            self.remove(i, digit)
+            if count >= limit:
+                break
+        self.empties.append(i)
+        return count
+
+    def _solve(self, rng):
+        if not self.empties:
+            return True
+        pos, mask = self._pick_cell()
+        if mask == 0:
+            return False
+
+        i = self._take(pos)
+        digits = DIGITS_OF[mask]
+        if rng is not None:
+            digits = list(digits)
+            rng.shuffle(digits)
+        for digit in digits:
+            self.nodes += 1
+            self.place(i, digit)
+            if self._solve(rng):
+                return True
+            self.remove(i, digit)
+        self.empties.append(i)
+        return False
+
+    def count_solutions(self, limit=2):
+        """Count solutions, stopping early once `limit` have been found"""
+        if not self.valid:
+            return 0
+        return self._count(limit)
+
+    def solve(self, rng=None):
+        """Fill the board and return it as 9x9 rows, or None if unsolvable.
+
+        Pass a random.Random (or the random module) as `rng` to try the
+        candidates in random order, which turns an empty board into a
+        random complete grid.
+        """
+        if not self.valid or not self._solve(rng):
+            return None
+        return to_rows(self.cells)
+
+
+# Exact-cover layout: 324 constraint columns and 729 candidate rows.
+# Columns 0-80 are "cell filled", 81-161 "digit in row", 162-242
+# "digit in column" and 243-323 "digit in box". Row r*81 + c*9 + d - 1
+# stands for placing digit d at (r, c).
+DLX_COLUMNS = 324
+DLX_ROOT = DLX_COLUMNS
+_dlx_template = None
+
+
+def _build_dlx_template():
+    """Build the full 729x324 link structure once; solvers copy it"""
+    size = DLX_COLUMNS + 1 + 729 * 4
+    left = [0] * size
+    right = [0] * size
+    up = [0] * size
+    down = [0] * size
+    column = [0] * size
+    row_of = [0] * size
+    sizes = [0] * DLX_COLUMNS
+
+    for col in range(DLX_COLUMNS + 1):
+        left[col] = col - 1
+        right[col] = col + 1
+        up[col] = down[col] = column[col] = col
+    left[0] = DLX_ROOT
+    right[DLX_ROOT] = 0
+    left[DLX_ROOT] = DLX_COLUMNS - 1
+    right[DLX_COLUMNS - 1] = DLX_ROOT
+
+    node = DLX_COLUMNS + 1
+    for row in range(729):
+        cell, digit = divmod(row, 9)
+        r, c, b = ROW_OF[cell], COL_OF[cell], BOX_OF[cell]
+        first = node
+        for k, col in enumerate((cell, 81 + r * 9 + digit, 162 + c * 9 + digit, 243 + b * 9 + digit)):
+            up[node] = up[col]
+            down[node] = col
+            down[up[col]] = node
+            up[col] = node
+            column[node] = col
+            row_of[node] = row
+            sizes[col] += 1
+            left[node] = node - 1 if k else first + 3
+            right[node] = node + 1 if k < 3 else first
+            node += 1
+
+    return left, right, up, down, column, row_of, sizes
+
+
+class DancingLinksSolver:
+    def __init__(self, board):
+        global _dlx_template
+        if _dlx_template is None:
+            _dlx_template = _build_dlx_template()
+        left, right, up, down, column, row_of, sizes = _dlx_template
+        self.left = list(left)
+        self.right = list(right)
+        self.up = list(up)
+        self.down = list(down)
+        self.column = column
+        self.row_of = row_of
+        self.sizes = list(sizes)
+        self.givens = flatten_board(board)
+        self.chosen = []
+        self.nodes = 0
+        self.valid = True
+        for counter in _work_counters:
+            counter.solvers.append(self)
+
+        # Select the candidate row of every given; a column that is already
+        # covered means two givens clash
+        covered = [False] * DLX_COLUMNS
+        for cell, value in enumerate(self.givens):
+            if value == 0:
+                continue
+            first = DLX_COLUMNS + 1 + (cell * 9 + value - 1) * 4
+            for node in range(first, first + 4):
+                col = column[node]
+                if covered[col]:
+                    self.valid = False
+                    return
+                covered[col] = True
+                self._cover(col)
+
+    def _cover(self, col):
+        left, right, up, down, column, sizes = (
+            self.left, self.right, self.up, self.down, self.column, self.sizes)
+        right[left[col]] = right[col]
+        left[right[col]] = left[col]
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                sizes[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def _uncover(self, col):
+        left, right, up, down, column, sizes = (
+            self.left, self.right, self.up, self.down, self.column, self.sizes)
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                sizes[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[col]] = col
+        left[right[col]] = col
+
+    def _pick_column(self):
+        """Column with the fewest remaining rows, or -1 when all are covered"""
+        right, sizes = self.right, self.sizes
+        col = right[DLX_ROOT]
+        if col == DLX_ROOT:
+            return -1
+        best = col
+        best_size = sizes[col]
+        while col != DLX_ROOT and best_size > 1:
+            if sizes[col] < best_size:
+                best, best_size = col, sizes[col]
+            col = right[col]
+        return best
+
+    def _rows_in(self, col):
+        nodes = []
+        i = self.down[col]
+        while i != col:
+            nodes.append(i)
+            i = self.down[i]
+        return nodes
+
+    def _select(self, node):
+        j = self.right[node]
+        while j != node:
+            self._cover(self.column[j])
+            j = self.right[j]
+
+    def _deselect(self, node):
+        j = self.left[node]
+        while j != node:
+            self._uncover(self.column[j])
+            j = self.left[j]
+
+    def _search(self, limit, rng, on_solution):
+        col = self._pick_column()
+        if col == -1:
+            on_solution()
+            return 1
+        if self.sizes[col] == 0:
+            return 0
+
+        self._cover(col)
+        rows = self._rows_in(col)
+        if rng is not None:
+            rng.shuffle(rows)
+        count = 0
+        for node in rows:
+            self.nodes += 1
+            self.chosen.append(self.row_of[node])
+            self._select(node)
+            count += self._search(limit - count, rng, on_solution)
+            self._deselect(node)
+            self.chosen.pop()
+            if count >= limit:
+                break
+        self._uncover(col)
+        return count
+
+    def _current_cells(self):
+        cells = list(self.givens)
+        for row in self.chosen:
+            cell, digit = divmod(row, 9)
+            cells[cell] = digit + 1
+        return cells
+
+    def count_solutions(self, limit=2):
+        """Count solutions, stopping early once `limit` have been found"""
+        if not self.valid:
+            return 0
+        return self._search(limit, None, lambda: None)
+
+    def iter_solutions(self, limit=None):
+        """List up to `limit` solutions (all of them when limit is None)"""
+        found = []
+        if self.valid:
+            cap = limit if limit is not None else float("inf")
+            self._search(cap, None, lambda: found.append(to_rows(self._current_cells())))
+        return found
+
+    def solve(self, rng=None):
+        """Fill the board and return it as 9x9 rows, or None if unsolvable"""
+        found = []
+        if self.valid:
+            self._search(1, rng, lambda: found.append(to_rows(self._current_cells())))
+        return found[0] if found else None
+
+
+SOLVER_BACKENDS = {
+    'bitmask': BitmaskSolver,
+    'dlx': DancingLinksSolver,
+}
+DEFAULT_BACKEND = 'bitmask'
+
+
+def make_solver(board, backend=DEFAULT_BACKEND):
+    """Build a solver for `board` using one of SOLVER_BACKENDS"""
+    if backend not in SOLVER_BACKENDS:
+        raise ValueError(f"Unknown solver backend: {backend}")
+    return SOLVER_BACKENDS[backend](board)
+
+
+def count_solutions(board, limit=2, backend=DEFAULT_BACKEND):
+    """Number of solutions of `board`, capped at `limit`"""
+    return make_solver(board, backend).count_solutions(limit)
+
+
+def solve(board, rng=None, backend=DEFAULT_BACKEND):
+    """Solved 9x9 rows for `board`, or None when it has no solution"""
+    return make_solver(board, backend).solve(rng)
+
+
+def random_solution(rng, backend=DEFAULT_BACKEND):
+    """A random complete, valid 9x9 grid"""
+    return make_solver([[0] * 9 for _ in range(9)], backend).solve(rng)
+
+
+# Complete grids from different equivalence classes; transformed_solution
+# reshuffles one of them instead of searching for a new grid
+SEED_GRIDS = [
+    "275349618341628579896751423453286791982175364617493285738964152169532847524817936",
+    "867159243491372568523648917158724639976831425234965781785216394649583172312497856",
+    "725836194168459732943712865659321478472698513381547629236185947514973286897264351",
+    "267318954389245761154769283925874136438196527716532849591623478642987315873451692",
+]
+
+
+def transformed_solution(rng, seed_grids=SEED_GRIDS):
+    """A random complete grid in constant time.
+
+    Picks a seed grid and applies validity-preserving transforms: digit
+    relabeling, row swaps within bands, column swaps within stacks, band
+    and stack swaps, and transposition.
+    """
+    grid = rng.choice(seed_grids)
+    digits = list(range(1, 10))
+    rng.shuffle(digits)
+    rows = [band * 3 + r for band in rng.sample(range(3), 3) for r in rng.sample(range(3), 3)]
+    cols = [stack * 3 + c for stack in rng.sample(range(3), 3) for c in rng.sample(range(3), 3)]
+    if rng.random() < 0.5:
+        return [[digits[int(grid[c * 9 + r]) - 1] for c in cols] for r in rows]
+    return [[digits[int(grid[r * 9 + c]) - 1] for c in cols] for r in rows]
+
+
+def remove_clues(solution, positions, cells_to_remove, backend=DEFAULT_BACKEND):
+    """Blank cells of a complete grid while the puzzle keeps a unique solution.
+
+    `positions` is the (row, col) order to try. With the bitmask backend one
+    solver state is kept for the whole run and the known solution serves as
+    the first witness, so each attempt only searches for a second solution
+    that differs in that cell. Other backends count the solutions of each
+    candidate puzzle. Every backend is exact, so the result is the same;
+    only the time differs. Returns the puzzle as 9x9 rows.
+    """
+    if backend != 'bitmask':
+        cells = flatten_board(solution)
+        removed = 0
+        for row, col in positions:
+            if removed >= cells_to_remove:
+                break
+            i = row * 9 + col
+            digit, cells[i] = cells[i], 0
+            if make_solver(to_rows(cells), backend).count_solutions(2) != 1:
+                cells[i] = digit
+            else:
+                removed += 1
+        return to_rows(cells)
+
+    solver = BitmaskSolver(solution)
+    removed = 0
+    for row, col in positions:
+        if removed >= cells_to_remove:
+            break
+        i = row * 9 + col
+        digit = solver.clear_cell(i)
+        if solver.has_alternative(i, digit):
+            solver.restore_cell(i, digit)
+        else:
+            removed += 1
+    return to_rows(solver.cells)
+
+
+# Number of cells to remove for each difficulty level. Each count is the
+# one that reaches the level's rating range (see sudoku_grader) at the
+# lowest cost per puzzle: removing fewer cells misses the range more
+# often, removing more makes every attempt slower.
+DIFFICULTY_LEVELS = {
+    'easy': 35,
+    'medium': 50,
+    'hard': 54,
+    'expert': 55
+}
+
+
+# Puzzles generated per call before settling for the closest rating
+GRADE_ATTEMPTS = 50
+
+
+def generate_puzzle(difficulty='medium', rng=random, backend=DEFAULT_BACKEND, fast=True):
+    """Generate a new puzzle and return (puzzle, solution) as 9x9 rows.
+
+    Candidates are graded and rejected until the rating matches the
+    difficulty level; after GRADE_ATTEMPTS tries the closest one is used.
+    With `fast` the solution grid comes from transformed_solution instead
+    of a solver search on an empty board, and the puzzle does not depend on
+    `backend`, which then only decides which solver checks uniqueness.
+    """
+    best = None
+    for _ in range(GRADE_ATTEMPTS):
+        solution = transformed_solution(rng) if fast else random_solution(rng, backend)
+        positions = [(i, j) for i in range(9) for j in range(9)]
+        rng.shuffle(positions)
+        puzzle = remove_clues(solution, positions, DIFFICULTY_LEVELS.get(difficulty, 45), backend)
+        distance = rating_distance(grade(puzzle)[0], difficulty)
+        for counter in _work_counters:
+            counter.attempts += 1
+        if best is None or distance < best[0]:
+            best = (distance, puzzle, solution)
+        if distance == 0:
+            break
+    return best[1], best[2]
+
+
+# Puzzle IDs: generator version, difficulty letter, then the seed in
+# base 36. Seeded puzzles are the same whichever solver backend checks
+# them, so the ID does not name one. The same ID always regenerates the
+# same puzzle, so sharing needs no storage. Bump ID_VERSION whenever a
+# change to generate_puzzle makes a seed give a different puzzle, so old
+# IDs are refused instead of loading the wrong puzzle.
+ID_VERSION = '3'
+ID_DIFFICULTY_CODES = {'easy': 'E', 'medium': 'M', 'hard': 'H', 'expert': 'X'}
+SEED_LIMIT = 2 ** 40
+BASE36 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def make_puzzle_id(difficulty, seed):
+    if not 0 <= seed < SEED_LIMIT:
+        raise ValueError(f"Seed must be between 0 and {SEED_LIMIT - 1}: {seed}")
+    digits = ""
+    while True:
+        seed, rest = divmod(seed, 36)
+        digits = BASE36[rest] + digits
+        if seed == 0:
+            break
+    return ID_VERSION + ID_DIFFICULTY_CODES[difficulty] + digits
+
+
+def parse_puzzle_id(puzzle_id):
+    """Return (difficulty, seed) encoded in a puzzle ID"""
+    puzzle_id = puzzle_id.strip().upper()
+    difficulties = {code: name for name, code in ID_DIFFICULTY_CODES.items()}
+    # Check the format first, so only an otherwise valid ID is blamed on
+    # the version digit
+    if (len(puzzle_id) < 3 or not puzzle_id[0].isdigit() or puzzle_id[1] not in difficulties
+            or any(ch not in BASE36 for ch in puzzle_id[2:])):
+        raise ValueError(f"Invalid puzzle ID: {puzzle_id or '(empty)'}")
+    if puzzle_id[0] != ID_VERSION:
+        raise ValueError(f"Puzzle ID {puzzle_id} is from another version of the generator")
+    seed = int(puzzle_id[2:], 36)
+    if seed >= SEED_LIMIT:
+        raise ValueError(f"Invalid puzzle ID: {puzzle_id}")
+    return difficulties[puzzle_id[1]], seed
+
+
+def generate_seeded_puzzle(difficulty, seed, backend=DEFAULT_BACKEND):
+    """Deterministic generate_puzzle: the same arguments give the same puzzle"""
+    return generate_puzzle(difficulty, random.Random(seed), backend)
+
+
+def generate_puzzle_with_id(difficulty='medium', rng=random, backend=DEFAULT_BACKEND):
+    """Generate a puzzle from a fresh seed; returns (puzzle, solution, puzzle_id)"""
+    seed = rng.randrange(SEED_LIMIT)
+    puzzle, solution = generate_seeded_puzzle(difficulty, seed, backend)
+    return puzzle, solution, make_puzzle_id(difficulty, seed)
+
+
+@lru_cache(maxsize=1024)
+def puzzle_from_id(puzzle_id):
+    """Rebuild a shared puzzle; returns (puzzle, solution, difficulty).
+
+    Accepts a seed ID from make_puzzle_id or an 81-character puzzle line
+    (used as the ID of puzzles that were not generated from a seed).
+    Boards are returned as tuples so cached results cannot be modified.
+    """
+    puzzle_id = puzzle_id.strip()
+    if len(puzzle_id) == 81:
+        puzzle = line_to_board(puzzle_id)
+        solver = make_solver(puzzle)
+        if solver.count_solutions(2) != 1:
+            raise ValueError("Puzzle does not have a unique solution")
+        solution = solve(puzzle)
+        difficulty = None
+    else:
+        difficulty, seed = parse_puzzle_id(puzzle_id)
+        puzzle, solution = generate_seeded_puzzle(difficulty, seed)
+    return (tuple(map(tuple, puzzle)), tuple(map(tuple, solution)), difficulty)
@@ -1,20 +1,20 @@
 import streamlit as st
 import numpy as np
-import random
-import time
 import base64
-import io
-import json
-import hashlib
+
+from app_common import (
+    apply_board_event, get_game_store, get_leaderboard, get_puzzle_pool,
+    leaderboard_expander, puzzle_pool_expander, redo_move, save_game,
+    session_id, undo_move,
+)
+from board_render import render_svg
+from sudoku_engine import DOCX_AVAILABLE, SudokuGame, export, game_from_id
+from sudoku_solver import DEFAULT_BACKEND, SOLVER_BACKENDS, board_to_line
+from puzzle_import import game_from_puzzle, import_puzzles, text_lines
+from session_metrics import record_fragment_rerun, record_rerun, reruns_per_minute, session_bytes
+from sudoku_board import live_timer, sudoku_board
+
 st.title("SUDUKU GENERATOR")
-# Try to import docx, but provide fallback if not installed
-try:
-    from docx import Document
-    from docx.shared import Inches, Pt, RGBColor
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
 
 # Set page configuration
 st.set_page_config(
@@ -161,383 +161,31 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-class SudokuGame:
-    def __init__(self, difficulty='medium'):
-        self.difficulty = difficulty
-        self.board = None
-        self.solution = None
-        self.user_board = None
-        self.start_time = None
-        self.end_time = None
-        self.hints_used = 0
-        self.errors = 0
-        self.puzzle_id = None
-        self.generate_new_puzzle()
-    
-    def generate_new_puzzle(self):
-        # Generate a complete Sudoku solution
-        self.solution = self.generate_solution()
-        
-        # Create puzzle by removing numbers based on difficulty
-        self.board = np.copy(self.solution)
-        self.user_board = np.copy(self.board)
-        
-        # Number of cells to remove based on difficulty
-        difficulty_levels = {
-            'easy': 35,
-            'medium': 45,
-            'hard': 50,
-            'expert': 55
-        }
-        
-        cells_to_remove = difficulty_levels.get(self.difficulty, 45)
-        
-        # Remove numbers randomly
-        all_positions = [(i, j) for i in range(9) for j in range(9)]
-        random.shuffle(all_positions)
-        
-        removed = 0
-        for i, j in all_positions:
-            if removed >= cells_to_remove:
-                break
-            
-            temp = self.board[i][j]
-            self.board[i][j] = 0
-            self.user_board[i][j] = 0
-            
-            if self.has_unique_solution():
-                removed += 1
-            else:
-                self.board[i][j] = temp
-                self.user_board[i][j] = temp
-        
-        self.start_time = time.time()
-        self.end_time = None
-        self.hints_used = 0
-        self.errors = 0
-        self.generate_puzzle_id()
-    
-    def generate_puzzle_id(self):
-        """Generate unique ID for sharing puzzles"""
-        puzzle_data = {
-            'board': self.board.tolist(),
-            'difficulty': self.difficulty,
-            'timestamp': time.time()
-        }
-        puzzle_str = json.dumps(puzzle_data, sort_keys=True)
-        self.puzzle_id = hashlib.md5(puzzle_str.encode()).hexdigest()[:8]
-    
-    def generate_solution(self):
-        board = np.zeros((9, 9), dtype=int)
-        
-        def fill_board(board, row=0, col=0):
-            if row == 9:
-                return True
-            if col == 9:
-                return fill_board(board, row + 1, 0)
-            if board[row][col] != 0:
-                return fill_board(board, row, col + 1)
-            
-            numbers = list(range(1, 10))
-            random.shuffle(numbers)
-            
-            for num in numbers:
-                if self.is_valid(board, row, col, num):
-                    board[row][col] = num
-                    if fill_board(board, row, col + 1):
-                        return True
-                    board[row][col] = 0
-            return False
-        
-        # Fill diagonal boxes first
-        for i in range(0, 9, 3):
-            numbers = list(range(1, 10))
-            random.shuffle(numbers)
-            for r in range(3):
-                for c in range(3):
-                    board[i + r][i + c] = numbers.pop()
-        
-        fill_board(board)
-        return board
-    
-    def is_valid(self, board, row, col, num):
-        if num in board[row]:
-            return False
-        if num in board[:, col]:
-            return False
-        box_row = (row // 3) * 3
-        box_col = (col // 3) * 3
-        if num in board[box_row:box_row+3, box_col:box_col+3]:
-            return False
-        return True
-    
-    def has_unique_solution(self):
-        board_copy = np.copy(self.board)
-        
-        def count_solutions(board, count=0):
-            for i in range(9):
-                for j in range(9):
-                    if board[i][j] == 0:
-                        for num in range(1, 10):
-                            if self.is_valid(board, i, j, num):
-                                board[i][j] = num
-                                count = count_solutions(board, count)
-                                if count > 1:
-                                    return count
-                                board[i][j] = 0
-                        return count
-            return count + 1
-        
-        return count_solutions(board_copy) == 1
-    
-    def get_hint(self):
-        empty_cells = []
-        for i in range(9):
-            for j in range(9):
-                if self.user_board[i][j] == 0:
-                    empty_cells.append((i, j))
-        
-        if empty_cells:
-            row, col = random.choice(empty_cells)
-            self.user_board[row][col] = self.solution[row][col]
-            self.hints_used += 1
-            return row, col
-        return None
-    
-    def check_solution(self):
-        for i in range(9):
-            for j in range(9):
-                if self.user_board[i][j] != self.solution[i][j]:
-                    return False
-        self.end_time = time.time()
-        return True
-    
-    def check_errors(self):
-        errors = []
-        for i in range(9):
-            for j in range(9):
-                if self.user_board[i][j] != 0:
-                    temp = self.user_board[i][j]
-                    self.user_board[i][j] = 0
-                    
-                    if not self.is_valid(self.user_board, i, j, temp):
-                        errors.append((i, j))
-                    
-                    self.user_board[i][j] = temp
-        return errors
-    
-    def get_elapsed_time(self):
-        if self.start_time is None:
-            return 0
-        if self.end_time is not None:
-            return int(self.end_time - self.start_time)
-        return int(time.time() - self.start_time)
-    
-    def format_time(self, seconds):
-        minutes = seconds // 60
-        seconds = seconds % 60
-        return f"{minutes:02d}:{seconds:02d}"
-    
-    # ADDED: is_complete method
-    def is_complete(self):
-        """Check if all cells are filled (not necessarily correctly)"""
-        return 0 not in self.user_board
-    
-    def export_to_word(self, include_solution=False):
-        """Export puzzle to Word document"""
-        if not DOCX_AVAILABLE:
-            # Return a simple text file if docx is not available
-            return self.export_to_text_file(include_solution)
-        
-        doc = Document()
-        
-        # Title
-        title = doc.add_heading('Sudoku Puzzle', 0)
-        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # Difficulty and info
-        doc.add_paragraph(f'Difficulty: {self.difficulty.title()}')
-        doc.add_paragraph(f'Puzzle ID: {self.puzzle_id}')
-        doc.add_paragraph(f'Date: {time.strftime("%Y-%m-%d %H:%M")}')
-        doc.add_paragraph()
-        
-        # Create puzzle grid
-        doc.add_heading('Puzzle Grid', level=1)
-        
-        # Create table for puzzle
-        table = doc.add_table(rows=9, cols=9)
-        table.style = 'Table Grid'
-        
-        # Fill table with puzzle numbers
-        for i in range(9):
-            row_cells = table.rows[i].cells
-            for j in range(9):
-                cell = row_cells[j]
-                cell.text = str(self.board[i][j]) if self.board[i][j] != 0 else ""
-                paragraph = cell.paragraphs[0]
-                paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                
-                # Style for given numbers (bold)
-                if self.board[i][j] != 0:
-                    for run in paragraph.runs:
-                        run.font.bold = True
-                        run.font.size = Pt(14)
-                else:
-                    for run in paragraph.runs:
-                        run.font.size = Pt(12)
-        
-        doc.add_paragraph()
-        
-        # Add solution if requested
-        if include_solution:
-            doc.add_heading('Solution', level=1)
-            
-            # Create table for solution
-            sol_table = doc.add_table(rows=9, cols=9)
-            sol_table.style = 'Table Grid'
-            
-            for i in range(9):
-                row_cells = sol_table.rows[i].cells
-                for j in range(9):
-                    cell = row_cells[j]
-                    cell.text = str(self.solution[i][j])
-                    paragraph = cell.paragraphs[0]
-                    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    for run in paragraph.runs:
-                        run.font.size = Pt(14)
-        
-        # Add instructions
-        doc.add_page_break()
-        doc.add_heading('How to Solve Sudoku', level=1)
-        doc.add_paragraph('''Sudoku Rules:
-1. Each row must contain the numbers 1-9 exactly once
-2. Each column must contain the numbers 1-9 exactly once
-3. Each 3x3 box must contain the numbers 1-9 exactly once
+# Uploaded puzzle files are read as a stream and checked while the page
+# waits, so reading stops at the first IMPORT_LIMIT valid puzzles or
+# IMPORT_REJECT_LIMIT rejected entries; bulk imports go through puzzle_import.py
+IMPORT_LIMIT = 100
+IMPORT_REJECT_LIMIT = 20
 
-Tips:
-• Start with rows/columns that have the most numbers
-• Look for numbers that can only go in one cell
-• Use pencil marks for possible numbers
-• Take your time and be patient!''')
-        
-        # Save to bytes
-        doc_bytes = io.BytesIO()
-        doc.save(doc_bytes)
-        doc_bytes.seek(0)
-        
-        return doc_bytes
-    
-    def export_to_text_file(self, include_solution=False):
-        """Export puzzle as text file with better formatting"""
-        text = f"SUDOKU PUZZLE\n"
-        text += "=" * 40 + "\n"
-        text += f"Difficulty: {self.difficulty.title()}\n"
-        text += f"Puzzle ID: {self.puzzle_id}\n"
-        text += f"Date: {time.strftime('%Y-%m-%d %H:%M')}\n"
-        text += "=" * 40 + "\n\n"
-        
-        # Create ASCII art grid
-        text += "PUZZLE GRID:\n"
-        text += "╔═══════╦═══════╦═══════╗\n"
-        
-        for i in range(9):
-            if i % 3 == 0 and i > 0:
-                text += "╠═══════╬═══════╬═══════╣\n"
-            
-            text += "║ "
-            for j in range(9):
-                if j % 3 == 0 and j > 0:
-                    text += "║ "
-                
-                value = self.board[i][j]
-                text += str(value) if value != 0 else "·"
-                text += " "
-            
-            text += "║\n"
-        
-        text += "╚═══════╩═══════╩═══════╝\n\n"
-        
-        if include_solution:
-            text += "SOLUTION:\n"
-            text += "╔═══════╦═══════╦═══════╗\n"
-            
-            for i in range(9):
-                if i % 3 == 0 and i > 0:
-                    text += "╠═══════╬═══════╬═══════╣\n"
-                
-                text += "║ "
-                for j in range(9):
-                    if j % 3 == 0 and j > 0:
-                        text += "║ "
-                    
-                    text += str(self.solution[i][j]) + " "
-                
-                text += "║\n"
-            
-            text += "╚═══════╩═══════╩═══════╝\n\n"
-        
-        # Add instructions
-        text += "INSTRUCTIONS:\n"
-        text += "-" * 40 + "\n"
-        text += "1. Fill each row with numbers 1-9 (no repeats)\n"
-        text += "2. Fill each column with numbers 1-9 (no repeats)\n"
-        text += "3. Fill each 3x3 box with numbers 1-9 (no repeats)\n"
-        text += "4. Use pencil marks for possible numbers\n"
-        text += "5. Start with rows/columns with most given numbers\n\n"
-        
-        text += "Share this puzzle with friends using Puzzle ID: " + self.puzzle_id
-        
-        return text
-    
-    def export_to_simple_text(self):
-        """Simple text export without fancy formatting"""
-        text = f"Sudoku Puzzle - {self.difficulty.title()}\n"
-        text += f"Puzzle ID: {self.puzzle_id}\n"
-        text += f"Date: {time.strftime('%Y-%m-%d %H:%M')}\n"
-        text += "=" * 40 + "\n\n"
-        
-        # Create simple grid
-        for i in range(9):
-            if i % 3 == 0 and i > 0:
-                text += "------+-------+------\n"
-            
-            for j in range(9):
-                if j % 3 == 0 and j > 0:
-                    text += "| "
-                
-                value = self.board[i][j]
-                text += str(value) if value != 0 else "."
-                text += " "
-            
-            text += "\n"
-        
-        text += "\nInstructions:\n"
-        text += "1. Fill each row with numbers 1-9 (no repeats)\n"
-        text += "2. Fill each column with numbers 1-9 (no repeats)\n"
-        text += "3. Fill each 3x3 box with numbers 1-9 (no repeats)\n"
-        
-        return text
-    
-    def get_shareable_data(self):
-        """Get data for sharing"""
-        return {
-            'puzzle_id': self.puzzle_id,
-            'difficulty': self.difficulty,
-            'board': self.board.tolist(),
-            'solution': self.solution.tolist(),
-            'timestamp': time.time(),
-            'share_text': f"""🎮 Sudoku Challenge!
-
-Difficulty: {self.difficulty.title()}
-Puzzle ID: {self.puzzle_id}
-Date: {time.strftime('%Y-%m-%d')}
-
-Can you solve it? Share your time!"""
-        }
+def read_upload(upload, backend):
+    """(line, puzzle, solution) of the first IMPORT_LIMIT valid puzzles, and the rejected count"""
+    puzzles, rejected = [], 0
+    for number, puzzle, solution, error in import_puzzles(text_lines(upload), backend):
+        if error:
+            rejected += 1
+            if rejected == IMPORT_REJECT_LIMIT:
+                break
+            continue
+        puzzles.append((number, puzzle, solution))
+        if len(puzzles) == IMPORT_LIMIT:
+            break
+    return puzzles, rejected
 
 # Initialize session state
 if 'game' not in st.session_state:
-    st.session_state.game = SudokuGame()
+    # A returning tab picks its game up from the session store
+    st.session_state.game = (get_game_store().load(session_id())
+                             or SudokuGame(puzzle=get_puzzle_pool().get('medium')))
 if 'show_errors' not in st.session_state:
     st.session_state.show_errors = False
 if 'show_hint' not in st.session_state:
@@ -545,15 +193,13 @@ if 'show_hint' not in st.session_state:
 if 'hint_cell' not in st.session_state:
     st.session_state.hint_cell = None
 if 'game_over' not in st.session_state:
-    st.session_state.game_over = False
+    st.session_state.game_over = st.session_state.game.end_time is not None
 if 'selected_cell' not in st.session_state:
     st.session_state.selected_cell = None
-if 'last_update' not in st.session_state:
-    st.session_state.last_update = time.time()
 if 'show_export_options' not in st.session_state:
     st.session_state.show_export_options = False
-if 'last_blink' not in st.session_state:
-    st.session_state.last_blink = time.time()
+
+record_rerun(st.session_state)
 
 # Main app
 st.markdown('<div class="main-header">🔢 SUDUKU BELOW</div>', unsafe_allow_html=True)
@@ -570,9 +216,17 @@ with st.sidebar:
         key="difficulty_selector"  # Added unique key
     )
     
+    # Solver engine used for generation and uniqueness checks
+    solver_backend = st.selectbox(
+        "Solver",
+        list(SOLVER_BACKENDS),
+        index=list(SOLVER_BACKENDS).index(DEFAULT_BACKEND),
+        key="solver_selector"
+    )
+    
     # New game
     if st.button("🔄 New Game", type="primary", use_container_width=True):
-        st.session_state.game = SudokuGame(difficulty)
+        st.session_state.game = SudokuGame(difficulty, solver_backend, puzzle=get_puzzle_pool().get(difficulty, solver_backend))
         st.session_state.show_errors = False
         st.session_state.show_hint = False
         st.session_state.hint_cell = None
@@ -600,21 +254,61 @@ with st.sidebar:
         st.info("📱 Puzzle ID (copy this):")
         st.code(share_data['puzzle_id'])
         
-        # Show simple grid for preview
+        # Preview drawn by the shared renderer (cached per puzzle)
         st.write("Puzzle preview:")
-        board = st.session_state.game.board
-        preview_text = ""
-        for i in range(9):
-            for j in range(9):
-                value = board[i][j]
-                preview_text += str(value) if value != 0 else "."
-                preview_text += " "
-                if j % 3 == 2 and j < 8:
-                    preview_text += "| "
-            preview_text += "\n"
-            if i % 3 == 2 and i < 8:
-                preview_text += "------+-------+------\n"
-        st.code(preview_text)
+        st.markdown(render_svg(board_to_line(st.session_state.game.board), size=270), unsafe_allow_html=True)
+    
+    # Load a shared puzzle: the ID regenerates the exact board
+    load_id = st.text_input("Load puzzle by ID", key="load_puzzle_id")
+    if st.button("📥 Load Puzzle", use_container_width=True):
+        if not load_id.strip():
+            st.error("Enter a puzzle ID to load")
+        else:
+            try:
+                game = game_from_id(load_id, difficulty, solver_backend)
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                st.session_state.game = game
+                st.session_state.show_errors = False
+                st.session_state.show_hint = False
+                st.session_state.hint_cell = None
+                st.session_state.game_over = False
+                st.session_state.selected_cell = None
+                st.rerun()
+    
+    # Import puzzles: 81-character lines (.txt, .sdm) or .sdk grids
+    upload = st.file_uploader("Import puzzles", type=["txt", "sdk", "sdm"], key="import_file")
+    if upload is None:
+        st.session_state.pop('imported', None)
+    else:
+        if st.session_state.get('imported', (None,))[0] != upload.file_id:
+            st.session_state.imported = (upload.file_id,) + read_upload(upload, solver_backend)
+        _, imported, rejected = st.session_state.imported
+        note = f"{len(imported)} valid puzzle{'' if len(imported) == 1 else 's'}"
+        if len(imported) == IMPORT_LIMIT:
+            note += f" (first {IMPORT_LIMIT} only)"
+        if rejected == IMPORT_REJECT_LIMIT:
+            note += f"; stopped reading after {rejected} invalid or not unique entries"
+        elif rejected:
+            note += f", {rejected} rejected (invalid or not unique)"
+        st.caption(note)
+        if imported:
+            choice = st.selectbox(
+                "Imported puzzle",
+                range(len(imported)),
+                format_func=lambda k: f"#{k + 1} (line {imported[k][0]})",
+                key="imported_choice"
+            )
+            if st.button("📂 Play Imported Puzzle", use_container_width=True):
+                _, puzzle, solution = imported[choice]
+                st.session_state.game = game_from_puzzle(puzzle, solution)
+                st.session_state.show_errors = False
+                st.session_state.show_hint = False
+                st.session_state.hint_cell = None
+                st.session_state.game_over = False
+                st.session_state.selected_cell = None
+                st.rerun()
     
     st.divider()
     
@@ -647,6 +341,9 @@ with st.sidebar:
         if not st.session_state.game_over:
             if st.session_state.game.check_solution():
                 st.session_state.game_over = True
+                game = st.session_state.game
+                get_leaderboard().record(game.puzzle_id, game.difficulty, game.get_elapsed_time(),
+                                         game.hints_used, game.errors)
                 st.balloons()
                 st.success("🎉 Puzzle solved!")
             else:
@@ -661,179 +358,198 @@ with st.sidebar:
         game = st.session_state.game
         st.write(f"**Time:** {game.format_time(game.get_elapsed_time())}")
         st.write(f"**Hints:** {game.hints_used}")
-        filled = 81 - np.count_nonzero(game.user_board == 0)
+        filled = game.filled
         st.write(f"**Progress:** {filled}/81")
         st.write(f"**Difficulty:** {game.difficulty.title()}")
         st.write(f"**Puzzle ID:** `{game.puzzle_id}`")
+        st.write(f"**Reruns/min:** {reruns_per_minute(st.session_state)}")
+        st.write(f"**Session state:** {session_bytes(st.session_state) / 1024:.1f} KB")
+    
+    puzzle_pool_expander()
+    leaderboard_expander()
+    
+    # Session store status
+    with st.expander("💾 Saved Games"):
+        store = get_game_store().stats()
+        flush = f"{store['last_flush_ms']} ms" if store['last_flush_ms'] is not None else "-"
+        st.write(f"**Stored:** {store['stored']} • **Pending:** {store['pending']}")
+        st.write(f"**Writes:** {store['writes']} in {store['flushes']} flushes • last flush {flush}")
 
-# Main game area
-col1, col2, col3 = st.columns([1, 2, 1])
+# Number buttons. These callbacks and the fragments below let a cell click
+# or a number button rerun only the board section instead of the whole script.
+def enter_number(num):
+    """Number button callback; runs before the rerun so the board shows the new value"""
+    if st.session_state.selected_cell:
+        game = st.session_state.game
+        original = game.board
+        i, j = st.session_state.selected_cell
+        if game.set_cell(i, j, num):
+            # Move to next cell automatically
+            found_next = False
+            for next_j in range(j+1, 9):
+                if original[i][next_j] == 0:
+                    st.session_state.selected_cell = (i, next_j)
+                    found_next = True
+                    break
+            if not found_next:
+                for next_i in range(i+1, 9):
+                    for next_j in range(9):
+                        if original[next_i][next_j] == 0:
+                            st.session_state.selected_cell = (next_i, next_j)
+                            found_next = True
+                            break
+                    if found_next:
+                        break
 
-with col2:
-    # Timer
-    if not st.session_state.game_over:
-        elapsed = st.session_state.game.get_elapsed_time()
-        st.markdown(f'<div class="timer">⏱️ {st.session_state.game.format_time(elapsed)}</div>', unsafe_allow_html=True)
-    
-    # Export options (if shown)
-    if st.session_state.show_export_options:
-        st.info("📤 Export Options")
-        col_export1, col_export2, col_export3 = st.columns(3)
-        
-        with col_export1:
-            # Export as Formatted Text
-            text_content = st.session_state.game.export_to_text_file(include_solution=False)
-            st.download_button(
-                label="📝 Text (Formatted)",
-                data=text_content,
-                file_name=f"sudoku_{st.session_state.game.puzzle_id}.txt",
-                mime="text/plain",
-                use_container_width=True
-            )
-        
-        with col_export2:
-            # Export as Text with Solution
-            text_content_sol = st.session_state.game.export_to_text_file(include_solution=True)
+def clear_selected_cell():
+    if st.session_state.selected_cell:
+        game = st.session_state.game
+        i, j = st.session_state.selected_cell
+        game.set_cell(i, j, 0)
+
+def export_data(fmt, include_solution=False):
+    """Download contents for the current puzzle, built on click and cached per puzzle and format"""
+    game = st.session_state.game
+    return lambda: export(game, fmt, include_solution)
+
+@st.fragment
+def export_panel():
+    """Export options; download clicks rerun only this panel"""
+    record_fragment_rerun(st.session_state)
+    st.info("📤 Export Options")
+    col_export1, col_export2, col_export3 = st.columns(3)
+    
+    with col_export1:
+        # Export as Formatted Text
+        st.download_button(
+            label="📝 Text (Formatted)",
+            data=export_data('text'),
+            file_name=f"sudoku_{st.session_state.game.puzzle_id}.txt",
+            mime="text/plain",
+            use_container_width=True
+        )
+    
+    with col_export2:
+        # Export as Text with Solution
+        st.download_button(
+            label="📝 Text (with Solution)",
+            data=export_data('text', include_solution=True),
+            file_name=f"sudoku_solution_{st.session_state.game.puzzle_id}.txt",
+            mime="text/plain",
+            use_container_width=True
+        )
+    
+    with col_export3:
+        # Export as Simple Text
+        st.download_button(
+            label="📄 Simple Text",
+            data=export_data('simple'),
+            file_name=f"sudoku_simple_{st.session_state.game.puzzle_id}.txt",
+            mime="text/plain",
+            use_container_width=True
+        )
+    
+    col_pdf1, col_pdf2 = st.columns(2)
+    
+    with col_pdf1:
+        # Export as PDF (Puzzle only)
+        st.download_button(
+            label="📄 PDF (Puzzle)",
+            data=export_data('pdf'),
+            file_name=f"sudoku_{st.session_state.game.puzzle_id}.pdf",
+            mime="application/pdf",
+            use_container_width=True
+        )
+    
+    with col_pdf2:
+        # Export as PDF (with solution)
+        st.download_button(
+            label="📄 PDF (Puzzle+Solution)",
+            data=export_data('pdf', include_solution=True),
+            file_name=f"sudoku_solution_{st.session_state.game.puzzle_id}.pdf",
+            mime="application/pdf",
+            use_container_width=True
+        )
+    
+    col_html1, col_html2 = st.columns(2)
+    
+    with col_html1:
+        # Export as HTML page (Puzzle only)
+        st.download_button(
+            label="🌐 HTML (Puzzle)",
+            data=export_data('html'),
+            file_name=f"sudoku_{st.session_state.game.puzzle_id}.html",
+            mime="text/html",
+            use_container_width=True
+        )
+    
+    with col_html2:
+        # Export as HTML page (with solution)
+        st.download_button(
+            label="🌐 HTML (Puzzle+Solution)",
+            data=export_data('html', include_solution=True),
+            file_name=f"sudoku_solution_{st.session_state.game.puzzle_id}.html",
+            mime="text/html",
+            use_container_width=True
+        )
+    
+    # Word export if available
+    if DOCX_AVAILABLE:
+        col_export4, col_export5 = st.columns(2)
+    
+        with col_export4:
+            # Export as Word (Puzzle only)
             st.download_button(
-                label="📝 Text (with Solution)",
-                data=text_content_sol,
-                file_name=f"sudoku_solution_{st.session_state.game.puzzle_id}.txt",
-                mime="text/plain",
+                label="📄 Word (Puzzle)",
+                data=export_data('docx'),
+                file_name=f"sudoku_{st.session_state.game.puzzle_id}.docx",
+                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                 use_container_width=True
             )
-        
-        with col_export3:
-            # Export as Simple Text
-            simple_text = st.session_state.game.export_to_simple_text()
+    
+        with col_export5:
+            # Export as Word (with solution)
             st.download_button(
-                label="📄 Simple Text",
-                data=simple_text,
-                file_name=f"sudoku_simple_{st.session_state.game.puzzle_id}.txt",
-                mime="text/plain",
+                label="📄 Word (Puzzle+Solution)",
+                data=export_data('docx', include_solution=True),
+                file_name=f"sudoku_solution_{st.session_state.game.puzzle_id}.docx",
+                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                 use_container_width=True
             )
-        
-        # Word export if available
-        if DOCX_AVAILABLE:
-            col_export4, col_export5 = st.columns(2)
-            
-            with col_export4:
-                # Export as Word (Puzzle only)
-                word_bytes = st.session_state.game.export_to_word(include_solution=False)
-                st.download_button(
-                    label="📄 Word (Puzzle)",
-                    data=word_bytes,
-                    file_name=f"sudoku_{st.session_state.game.puzzle_id}.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                    use_container_width=True
-                )
-            
-            with col_export5:
-                # Export as Word (with solution)
-                word_bytes_sol = st.session_state.game.export_to_word(include_solution=True)
-                st.download_button(
-                    label="📄 Word (Puzzle+Solution)",
-                    data=word_bytes_sol,
-                    file_name=f"sudoku_solution_{st.session_state.game.puzzle_id}.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                    use_container_width=True
-                )
-        else:
-            st.info("💡 Install python-docx for Word export: `pip install python-docx`")
-        
-        if st.button("Close Export Options"):
-            st.session_state.show_export_options = False
-            st.rerun()
-        
-        st.divider()
+    else:
+        st.info("💡 PDF export is built in; install python-docx for Word export: `pip install python-docx`")
+    
+    if st.button("Close Export Options"):
+        st.session_state.show_export_options = False
+        st.rerun()
     
-    # Sudoku grid
+    st.divider()
+
+@st.fragment
+def board_panel():
+    """Grid, number pad, game status and progress"""
+    record_fragment_rerun(st.session_state)
+    apply_board_event()
     game = st.session_state.game
     board = game.user_board
     original = game.board
     
     st.markdown('<div class="sudoku-container">', unsafe_allow_html=True)
     
-    # Create grid with st.columns for better control
-    for i in range(9):
-        cols = st.columns(9)
-        for j in range(9):
-            with cols[j]:
-                # Determine cell value
-                cell_value = original[i][j] if original[i][j] != 0 else board[i][j]
-                display_text = str(cell_value) if cell_value != 0 else ""
-                
-                # Determine CSS classes
-                css_classes = ["sudoku-cell"]
-                
-                # Thick borders for 3x3 boxes
-                if j % 3 == 2 and j < 8:
-                    css_classes.append("thick-right")
-                if i % 3 == 2 and i < 8:
-                    css_classes.append("thick-bottom")
-                
-                # Check cell type
-                if original[i][j] != 0:
-                    # Given cell
-                    css_classes.append("given-cell")
-                else:
-                    # User cell
-                    css_classes.append("user-cell")
-                    
-                    # Check if selected (with blinking)
-                    if st.session_state.selected_cell == (i, j):
-                        css_classes.append("selected-cell")
-                    
-                    # Check for errors
-                    if st.session_state.show_errors:
-                        errors = game.check_errors()
-                        if (i, j) in errors:
-                            css_classes.append("error-cell")
-                    
-                    # Check for hint
-                    if st.session_state.show_hint and st.session_state.hint_cell == (i, j):
-                        css_classes.append("hint-cell")
-                
-                # Create a clickable button for the cell
-                cell_key = f"cell_{i}_{j}_{game.puzzle_id}"
-                
-                # Use st.button directly with custom class
-                if st.button(
-                    display_text, 
-                    key=cell_key,
-                    use_container_width=True
-                ):
-                    if original[i][j] == 0:
-                        st.session_state.selected_cell = (i, j)
-                        st.session_state.last_update = time.time()
-                        st.session_state.last_blink = time.time()
-                        st.rerun()
-                
-                # Apply CSS classes via JavaScript
-                css_class_str = " ".join(css_classes)
-                st.markdown(f"""
-                <script>
-                    // Apply CSS classes to the button
-                    const button = document.querySelector('button[data-testid="stButton"][data-test-state="{cell_key}"]');
-                    if (button) {{
-                        button.className = '{css_class_str}';
-                        const parentDiv = button.parentElement;
-                        if (parentDiv) {{
-                            parentDiv.className = '{css_class_str}';
-                        }}
-                    }}
-                </script>
-                """, unsafe_allow_html=True)
+    # The whole grid is one component; clicks and keys come back as one event
+    sudoku_board(
+        board,
+        original,
+        selected=st.session_state.selected_cell,
+        errors=game.check_errors() if st.session_state.show_errors else (),
+        hint=st.session_state.hint_cell if st.session_state.show_hint else None,
+        cell_size=45,
+        font_size=26,
+        blink=not st.session_state.game_over,
+    )
     
     st.markdown('</div>', unsafe_allow_html=True)
     
-    # Auto-refresh for blinking animation
-    current_time = time.time()
-    if (current_time - st.session_state.last_blink > 0.5 and 
-        st.session_state.selected_cell and not st.session_state.game_over):
-        st.session_state.last_blink = current_time
-        st.rerun()
-    
     # Number buttons
     st.markdown('<div class="number-buttons">', unsafe_allow_html=True)
     
@@ -842,42 +558,53 @@ with col2:
     
     for num in range(1, 10):
         with num_cols[num-1]:
-            if st.button(str(num), key=f"num_{num}_{game.puzzle_id}", use_container_width=True):
-                if st.session_state.selected_cell:
-                    i, j = st.session_state.selected_cell
-                    if original[i][j] == 0:
-                        game.user_board[i][j] = num
-                        st.session_state.last_update = time.time()
-                        # Move to next cell automatically
-                        found_next = False
-                        for next_j in range(j+1, 9):
-                            if original[i][next_j] == 0:
-                                st.session_state.selected_cell = (i, next_j)
-                                found_next = True
-                                break
-                        if not found_next:
-                            for next_i in range(i+1, 9):
-                                for next_j in range(9):
-                                    if original[next_i][next_j] == 0:
-                                        st.session_state.selected_cell = (next_i, next_j)
-                                        found_next = True
-                                        break
-                                if found_next:
-                                    break
-                        st.rerun()
+            st.button(str(num), key=f"num_{num}_{game.puzzle_id}", on_click=enter_number, args=(num,), use_container_width=True)
     
     # Clear button
     with num_cols[9]:
-        if st.button("✕", key=f"clear_{game.puzzle_id}", type="secondary", use_container_width=True):
-            if st.session_state.selected_cell:
-                i, j = st.session_state.selected_cell
-                if original[i][j] == 0:
-                    game.user_board[i][j] = 0
-                    st.session_state.last_update = time.time()
-                    st.rerun()
+        st.button("✕", key=f"clear_{game.puzzle_id}", type="secondary", on_click=clear_selected_cell, use_container_width=True)
+    
+    # Undo / redo
+    undo_col, redo_col = st.columns(2)
+    with undo_col:
+        st.button("↶ Undo", key="undo", on_click=undo_move, disabled=not game.can_undo(), use_container_width=True)
+    with redo_col:
+        st.button("↷ Redo", key="redo", on_click=redo_move, disabled=not game.can_redo(), use_container_width=True)
     
     st.markdown('</div>', unsafe_allow_html=True)
     
+    # Game status - NOW USING THE is_complete() METHOD
+    if st.session_state.game_over:
+        st.success(f"🎉 **Solved!** Time: {game.format_time(game.get_elapsed_time())}")
+    elif game.is_complete():
+        st.warning("✅ All cells filled! Click 'Check Solution' to verify.")
+    
+    # Progress
+    filled = game.filled
+    progress = filled / 81
+    st.subheader("Progress")
+    st.progress(progress)
+    st.caption(f"{filled}/81 cells ({progress*100:.0f}%)")
+    
+    save_game()
+
+# Main game area
+game = st.session_state.game
+original = game.board
+
+col1, col2, col3 = st.columns([1, 2, 1])
+
+with col2:
+    # Timer (ticks in the browser, no server reruns)
+    if not st.session_state.game_over:
+        live_timer(st.session_state.game.get_elapsed_time())
+    
+    # Export options (if shown)
+    if st.session_state.show_export_options:
+        export_panel()
+    
+    board_panel()
+    
     # Quick Export buttons
     st.markdown('<div class="export-buttons">', unsafe_allow_html=True)
     
@@ -896,47 +623,21 @@ with col2:
             st.caption("Share this ID with friends to play the same puzzle!")
     
     st.markdown('</div>', unsafe_allow_html=True)
-    
-    # Instructions
-   # if st.session_state.selected_cell:
- #       i, j = st.session_state.selected_cell
-   #     st.info(f"🔵 **Selected: Row {i+1}, Column {j+1}** (should blink)")
-     #   if original[i][j] == 0:
- #           st.caption("Click a number above to enter it. Cell will blink until you select another.")
-#    else:
-#        st.info("👆 Click on any empty cell to select it (it will blink), then click a number")
-    
-    # Game status - NOW USING THE is_complete() METHOD
-    if st.session_state.game_over:
-        st.success(f"🎉 **Solved!** Time: {game.format_time(game.get_elapsed_time())}")
-    elif game.is_complete():
-        st.warning("✅ All cells filled! Click 'Check Solution' to verify.")
 
 # Bottom section
 st.divider()
 
-col4, col5, col6 = st.columns(3)
-
-with col4:
-    # Progress
-    filled = 81 - np.count_nonzero(game.user_board == 0)
-    progress = filled / 81
-    st.subheader("Progress")
-    st.progress(progress)
-    st.caption(f"{filled}/81 cells ({progress*100:.0f}%)")
+col5, col6 = st.columns(2)
 
 with col5:
     # Quick actions
     st.subheader("Quick Actions")
     
     if st.button("🗑️ Clear All", key="clear_all", use_container_width=True):
-        for i in range(9):
-            for j in range(9):
-                if original[i][j] == 0:
-                    game.user_board[i][j] = 0
+        game.clear_all()
         st.session_state.show_errors = False
         st.session_state.selected_cell = None
-        st.success("Cleared all your numbers!")
+        st.success("Cleared all your numbers! Undo brings them back.")
         st.rerun()
     
     #if st.button("📋 Copy Puzzle ID", key="copy_puzzle_id", use_container_width=True):
@@ -948,12 +649,16 @@ with col6:
     st.subheader("Puzzle Info")
     #st.write(f"**ID:** `{game.puzzle_id}`")
     st.write(f"**Difficulty:** {game.difficulty.title()}")
+    st.write(f"**Rating:** {game.rating} ({game.hardest_technique})")
     given_count = np.count_nonzero(game.board != 0)
     st.write(f"**Given numbers:** {given_count}")
     st.write(f"**Empty cells:** {81 - given_count}")
 st.write("developed by Subramanian Ramajayam")
 
 
+# Queue this session's game for the session store (written in the background)
+save_game()
+
 # Footer
 st.divider()
 st.markdown(f'<div class="instructions">🔢 Sudoku Game • Puzzle ID: {game.puzzle_id} • Export to multiple formats • Share with friends!</div>', unsafe_allow_html=True)